@@ -6,16 +6,16 @@ Multi-agent system for healthcare provider directory validation
 
 import time
 import re
+from operator import attrgetter
 from lookup_tables import (
-    SPECIALTY_LIST,
     CITY_TYPOS,
     PINCODE_TO_CITY,
     is_valid_indian_phone,
     is_valid_pincode,
     matches_reg_pattern,
-    all_required_fields_present,
-    REQUIRED_FIELDS
+    current_snapshot
 )
+from provider_record import ProviderRecord
 
 # ============================================================================
 # AGENT 1: DATA VALIDATION ENGINE
@@ -24,6 +24,23 @@ from lookup_tables import (
 # Scoring: 5 checks × 20 points = 0-100
 # ============================================================================
 
+# Optional registry_index.RegistryIndex checked after the pattern test.
+# Left as None, registration numbers are only shape-checked.
+_registry_index = None
+REGISTRY_MISS_ISSUE = "Registration number '{}' not found in registry"
+
+
+def use_registry_index(index):
+    """
+    Check registration numbers against a registry index from now on.
+    
+    Args:
+        index (RegistryIndex or None): Opened index (None disables the check)
+    """
+    global _registry_index
+    _registry_index = index
+
+
 def _validate_phone(phone, issues_list):
     """
     Check if phone number is valid Indian format.
@@ -60,9 +77,10 @@ def _validate_pincode(pincode, issues_list):
 
 def _validate_specialty(specialty, issues_list):
     """
-    Check if specialty is in approved SPECIALTY_LIST.
+    Check if specialty is in the approved specialty list.
     
-    Case-insensitive matching.
+    Case-insensitive matching against the lookup snapshot currently in
+    effect, so hot-reloaded specialty lists apply without a restart.
     
     Args:
         specialty (str): Specialty to validate
@@ -77,25 +95,29 @@ def _validate_specialty(specialty, issues_list):
     
     # Case-insensitive check
     specialty_upper = str(specialty).strip().upper()
-    specialty_list_upper = [s.upper() for s in SPECIALTY_LIST]
     
-    if specialty_upper not in specialty_list_upper:
+    if specialty_upper not in current_snapshot().specialties_upper:
         issues_list.append(f"Specialty '{specialty}' not in approved list")
         return 0
     
     return 20
 
 
-def _validate_registration_number(registration_no, issues_list):
+def _validate_registration_number(registration_no, issues_list, check_registry=True):
     """
     Check if registration number matches expected pattern.
     
     Expected: 2-4 letter prefix + 5-11 digits
     Examples: MCI10012345, TN0001234, KA123456
     
+    If a registry index is configured (see use_registry_index), a well-formed
+    number must also appear in the national registry snapshot.
+    
     Args:
         registration_no (str): Registration number to validate
         issues_list (list): List to append issues to
+        check_registry (bool): Look the number up in the registry index, if
+            one is configured (batch callers test whole columns at once instead)
     
     Returns:
         int: 20 if valid, 0 if invalid
@@ -104,31 +126,75 @@ def _validate_registration_number(registration_no, issues_list):
         issues_list.append(f"Registration number '{registration_no}' format invalid")
         return 0
     
+    if check_registry and _registry_index is not None and not _registry_index.contains(registration_no):
+        issues_list.append(REGISTRY_MISS_ISSUE.format(registration_no))
+        return 0
+    
     return 20
 
 
+_required_values = attrgetter(*ProviderRecord.FIELDS)
+
+
 def _validate_required_fields(record, issues_list):
     """
     Check if all required fields are present and non-empty.
     
+    Missing values were normalized to "" when the record was built.
+    
     Args:
-        record (dict): Record to validate
+        record (ProviderRecord): Record to validate
         issues_list (list): List to append issues to
     
     Returns:
         int: 20 if all present, 0 if any missing
     """
-    if not all_required_fields_present(record):
-        missing = []
-        for field in REQUIRED_FIELDS:
-            if field not in record or str(record[field]).strip() == '':
-                missing.append(field)
+    if "" in _required_values(record):
+        missing = [field for field in ProviderRecord.FIELDS if getattr(record, field) == ""]
         issues_list.append(f"Missing required fields: {', '.join(missing)}")
         return 0
     
     return 20
 
 
+def _agent_1_validation_record(record, start_time):
+    """
+    Agent 1 checks on a normalized ProviderRecord.
+    
+    Fields were normalized when the record was built, so the checks read
+    attributes directly instead of repeated record.get/str() calls.
+    
+    Args:
+        record (ProviderRecord): Provider record
+        start_time (float): time.time() when validation started
+    
+    Returns:
+        dict: Same shape as agent_1_validation
+    """
+    issues = []
+    
+    # ====================================================================
+    # CHECK 1: REQUIRED FIELDS PRESENT (20 points)
+    # If any is missing we can't validate further
+    # ====================================================================
+    score = _validate_required_fields(record, issues)
+    if score:
+        # ================================================================
+        # CHECKS 2-5: PHONE, PINCODE, SPECIALTY, REGISTRATION (20 each)
+        # ================================================================
+        score += _validate_phone(record.phone, issues)
+        score += _validate_pincode(record.pincode, issues)
+        score += _validate_specialty(record.specialty, issues)
+        score += _validate_registration_number(record.registration_no, issues)
+    
+    execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+    return {
+        'confidence_agent1': score,  # 0-100
+        'issues_validation': issues,  # List of what failed
+        'execution_time_agent1': round(execution_time, 2)  # ms
+    }
+
+
 def agent_1_validation(record):
     """
     AGENT 1: Data Validation Engine
@@ -144,7 +210,7 @@ def agent_1_validation(record):
     Total: 0-100 points
     
     Args:
-        record (dict): Single provider record from DataFrame
+        record (dict or ProviderRecord): Single provider record
     
     Returns:
         dict: {
@@ -155,60 +221,12 @@ def agent_1_validation(record):
     """
     start_time = time.time()
     
-    score = 0
-    issues = []
-    
-    # ====================================================================
-    # CHECK 1: REQUIRED FIELDS PRESENT (20 points)
-    # ====================================================================
-    score += _validate_required_fields(record, issues)
-    
-    # If required fields missing, we can't validate further
-    if score == 0:
-        execution_time = (time.time() - start_time) * 1000  # Convert to ms
-        return {
-            'confidence_agent1': 0,
-            'issues_validation': issues,
-            'execution_time_agent1': round(execution_time, 2)
-        }
-    
-    # ====================================================================
-    # CHECK 2: PHONE FORMAT (20 points)
-    # ====================================================================
-    phone = record.get('phone', '')
-    score += _validate_phone(phone, issues)
-    
-    # ====================================================================
-    # CHECK 3: PINCODE FORMAT (20 points)
-    # ====================================================================
-    pincode = record.get('pincode', '')
-    score += _validate_pincode(pincode, issues)
-    
-    # ====================================================================
-    # CHECK 4: SPECIALTY IN APPROVED LIST (20 points)
-    # ====================================================================
-    specialty = record.get('specialty', '')
-    score += _validate_specialty(specialty, issues)
-    
-    # ====================================================================
-    # CHECK 5: REGISTRATION NUMBER PATTERN (20 points)
-    # ====================================================================
-    registration_no = record.get('registration_no', '')
-    score += _validate_registration_number(registration_no, issues)
-    
-    # ====================================================================
-    # CALCULATE EXECUTION TIME
-    # ====================================================================
-    execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-    
-    # ====================================================================
-    # RETURN RESULTS
-    # ====================================================================
-    return {
-        'confidence_agent1': score,  # 0-100
-        'issues_validation': issues,  # List of what failed
-        'execution_time_agent1': round(execution_time, 2)  # ms
-    }
+    # Dict input is normalized exactly like ProviderRecord input (missing or
+    # NaN -> "", text stripped, 560001.0 -> "560001"), so a row scores the
+    # same whichever way it was read
+    if not isinstance(record, ProviderRecord):
+        record = ProviderRecord.from_dict(record)
+    return _agent_1_validation_record(record, start_time)
 
 
 # ============================================================================
@@ -386,6 +404,36 @@ if __name__ == "__main__":
     assert result['confidence_agent1'] == 100, "Should accept uppercase specialty"
     print("  ✓ PASSED")
     
+    # Test Case 9: ProviderRecord input
+    print("\n📋 TEST 9: ProviderRecord Input (same result as dict)")
+    print("-" * 70)
+    record_input = ProviderRecord.from_dict(multi_issue_record)
+    result = agent_1_validation(record_input)
+    print(f"  Confidence: {result['confidence_agent1']}/100")
+    print(f"  Issues: {result['issues_validation']}")
+    assert result['confidence_agent1'] == 60, "ProviderRecord should score like the dict record"
+    assert result['issues_validation'] == agent_1_validation(multi_issue_record)['issues_validation'], "Issues should match"
+    print("  ✓ PASSED")
+    
+    # Test Case 10: dict / ProviderRecord parity on pandas-style values
+    print("\n📋 TEST 10: Dict and ProviderRecord Parity (NaN, floats, padding)")
+    print("-" * 70)
+    parity_cases = [
+        ({**perfect_record, 'phone': float('nan')}, 0),       # NaN cell -> missing
+        ({**perfect_record, 'pincode': 560001.0}, 100),       # read_csv float column
+        ({**perfect_record, 'specialty': ' Foo '}, 80),       # padded, unknown specialty
+        ({**perfect_record, 'years_practice': 8.0}, 100),
+        ({**perfect_record, 'clinic_address': None}, 0),
+        ({key: value for key, value in perfect_record.items() if key != 'city'}, 0),
+    ]
+    for case, expected_score in parity_cases:
+        from_dict = agent_1_validation(case)
+        from_record = agent_1_validation(ProviderRecord.from_dict(case))
+        assert from_dict['confidence_agent1'] == from_record['confidence_agent1'] == expected_score, case
+        assert from_dict['issues_validation'] == from_record['issues_validation'], case
+    print(f"  {len(parity_cases)} cases score identically as dict and ProviderRecord")
+    print("  ✓ PASSED")
+    
     print("\n" + "="*70)
     print("✅ ALL TESTS PASSED - AGENT 1 VALIDATION ENGINE WORKING CORRECTLY")
     print("="*70)
@@ -0,0 +1,545 @@
+# aggregation.py
+"""
+MedVerify AI - Streaming Aggregation
+Single-pass, mergeable summaries of Agent 1 output and report writers
+"""
+
+import argparse
+import csv
+import json
+import math
+import time
+
+from agents import agent_1_validation
+from lookup_tables import canonical_specialty, current_snapshot, standardize_city
+from profiling import add_profile_arguments, profile_run
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Issue prefix -> check name, in the order Agent 1 runs the checks
+ISSUE_CHECKS = (
+    ("Missing required fields", "required_fields"),
+    ("Invalid phone", "phone"),
+    ("Invalid pincode", "pincode"),
+    ("Specialty", "specialty"),
+    ("Registration number", "registration_no"),
+)
+CHECK_NAMES = tuple(check for _, check in ISSUE_CHECKS) + ("other",)
+
+MAX_SCORE = 100
+DEFAULT_MAX_GROUPS = 1000        # distinct cities/specialties tracked before folding into OTHER_GROUP
+OTHER_GROUP = "__other__"
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+REPORT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def classify_issue(issue):
+    """
+    Map an Agent 1 issue message to the check that produced it.
+
+    Args:
+        issue (str): Entry from 'issues_validation'
+
+    Returns:
+        str: Check name from CHECK_NAMES
+    """
+    for prefix, check in ISSUE_CHECKS:
+        if issue.startswith(prefix):
+            return check
+    return "other"
+
+
+# ============================================================================
+# DDSKETCH - Mergeable quantile sketch with relative-error guarantees
+# ============================================================================
+# Values are bucketed on a logarithmic grid: bucket i covers
+# (gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a). Any quantile is
+# returned within relative error a, and two sketches merge exactly by adding
+# bucket counts. Only non-negative values (durations) are supported.
+
+class DDSketch:
+    """
+    Fixed-accuracy quantile sketch for non-negative values.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_bins=DEFAULT_MAX_BINS):
+        """
+        Args:
+            relative_accuracy (float): Relative error bound, 0 < a < 1
+            max_bins (int): Bucket limit; beyond it the lowest buckets collapse
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, count=1):
+        """
+        Add a value (count times).
+
+        Args:
+            value (float): Non-negative value
+            count (int): Number of occurrences
+        """
+        if value < 0:
+            raise ValueError("DDSketch only accepts non-negative values")
+
+        if value == 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        """Fold the lowest buckets together until within max_bins."""
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self.bins[target] += self.bins.pop(index)
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one (exact: bucket counts add).
+
+        Args:
+            other (DDSketch): Sketch with the same relative accuracy
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+
+        Args:
+            q (float): Quantile in [0, 1]
+
+        Returns:
+            float: Estimated value (None if the sketch is empty)
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Serialize to a JSON-friendly dict.
+        """
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a sketch from to_dict() output.
+        """
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        if data["count"]:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+# ============================================================================
+# VALIDATION AGGREGATOR
+# ============================================================================
+
+class ValidationAggregator:
+    """
+    Single-pass summary of Agent 1 results.
+
+    Memory is bounded regardless of input size: a 0-100 score histogram,
+    one counter per check, at most max_groups city/specialty breakdowns and
+    a DDSketch for execution times. Aggregators built on separate shards
+    merge exactly (breakdowns stay exact while under max_groups).
+    """
+
+    def __init__(self, max_groups=DEFAULT_MAX_GROUPS, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        """
+        Args:
+            max_groups (int): Distinct cities/specialties tracked per breakdown
+            relative_accuracy (float): Timing quantile accuracy
+        """
+        self.max_groups = max_groups
+        self.records = 0
+        self.score_total = 0
+        self.records_with_issues = 0
+        self.score_histogram = [0] * (MAX_SCORE + 1)
+        self.check_failures = dict.fromkeys(CHECK_NAMES, 0)
+        self.by_city = {}
+        self.by_specialty = {}
+        self.timing_ms = DDSketch(relative_accuracy)
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def _add_group(self, groups, name, records, score_total, with_issues):
+        name = name or "(missing)"
+        group = groups.get(name)
+        if group is None:
+            if len(groups) >= self.max_groups and name != OTHER_GROUP:
+                return self._add_group(groups, OTHER_GROUP, records, score_total, with_issues)
+            group = groups[name] = [0, 0, 0]
+        group[0] += records
+        group[1] += score_total
+        group[2] += with_issues
+
+    def update(self, record, result, seconds=None):
+        """
+        Fold one record and its Agent 1 result into the aggregate.
+
+        Args:
+            record (dict): Provider record that was validated
+            result (dict): Output of agent_1_validation
+            seconds (float): Measured validation time; execution_time_agent1
+                is rounded to 0.01 ms, too coarse for the timing percentiles,
+                and is only used when this is not given
+        """
+        score = int(result["confidence_agent1"])
+        issues = result["issues_validation"]
+        with_issues = 1 if issues else 0
+
+        self.records += 1
+        self.score_total += score
+        self.records_with_issues += with_issues
+        self.score_histogram[min(max(score, 0), MAX_SCORE)] += 1
+
+        for issue in issues:
+            self.check_failures[classify_issue(issue)] += 1
+
+        city = standardize_city(record.get("city", ""), record.get("pincode", ""))
+        specialty = canonical_specialty(record.get("specialty", ""))
+        self._add_group(self.by_city, city, 1, score, with_issues)
+        self._add_group(self.by_specialty, specialty, 1, score, with_issues)
+
+        if seconds is None:
+            self.timing_ms.add(float(result.get("execution_time_agent1", 0.0)))
+        else:
+            self.timing_ms.add(seconds * 1000)
+
+    def merge(self, other):
+        """
+        Merge another aggregator (e.g. from a parallel shard) into this one.
+
+        Args:
+            other (ValidationAggregator): Aggregator to fold in
+
+        Returns:
+            ValidationAggregator: self
+        """
+        self.records += other.records
+        self.score_total += other.score_total
+        self.records_with_issues += other.records_with_issues
+        self.score_histogram = [a + b for a, b in zip(self.score_histogram, other.score_histogram)]
+
+        for check, count in other.check_failures.items():
+            self.check_failures[check] = self.check_failures.get(check, 0) + count
+
+        for mine, theirs in ((self.by_city, other.by_city), (self.by_specialty, other.by_specialty)):
+            for name, (records, score_total, with_issues) in theirs.items():
+                self._add_group(mine, name, records, score_total, with_issues)
+
+        self.timing_ms.merge(other.timing_ms)
+        return self
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        """
+        Serialize to a JSON-friendly dict (for shipping between processes).
+        """
+        return {
+            "max_groups": self.max_groups,
+            "records": self.records,
+            "score_total": self.score_total,
+            "records_with_issues": self.records_with_issues,
+            "score_histogram": self.score_histogram,
+            "check_failures": self.check_failures,
+            "by_city": self.by_city,
+            "by_specialty": self.by_specialty,
+            "timing_ms": self.timing_ms.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild an aggregator from to_dict() output.
+        """
+        aggregator = cls(max_groups=data["max_groups"])
+        aggregator.records = data["records"]
+        aggregator.score_total = data["score_total"]
+        aggregator.records_with_issues = data["records_with_issues"]
+        aggregator.score_histogram = list(data["score_histogram"])
+        aggregator.check_failures = dict(data["check_failures"])
+        aggregator.by_city = {name: list(group) for name, group in data["by_city"].items()}
+        aggregator.by_specialty = {name: list(group) for name, group in data["by_specialty"].items()}
+        aggregator.timing_ms = DDSketch.from_dict(data["timing_ms"])
+        return aggregator
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _group_rows(groups):
+        rows = []
+        for name, (records, score_total, with_issues) in sorted(groups.items(), key=lambda item: -item[1][0]):
+            rows.append({
+                "name": name,
+                "records": records,
+                "average_score": round(score_total / records, 2) if records else 0.0,
+                "records_with_issues": with_issues,
+            })
+        return rows
+
+    def summary(self):
+        """
+        Build the summary report.
+
+        Returns:
+            dict: {
+                'records', 'average_score', 'records_with_issues',
+                'score_distribution': {score: count} (non-zero scores only),
+                'check_failures': {check: count},
+                'by_city' / 'by_specialty': list of group rows,
+                'timing_ms': {'mean', 'min', 'max', 'p50', 'p90', 'p95', 'p99'}
+            }
+        """
+        timing = {
+            "mean": round(self.timing_ms.total / self.timing_ms.count, 4) if self.timing_ms.count else None,
+            "min": round(self.timing_ms.min, 4) if self.timing_ms.count else None,
+            "max": round(self.timing_ms.max, 4) if self.timing_ms.count else None,
+        }
+        for q in REPORT_QUANTILES:
+            value = self.timing_ms.quantile(q)
+            timing[f"p{int(q * 100)}"] = round(value, 4) if value is not None else None
+
+        return {
+            "records": self.records,
+            "average_score": round(self.score_total / self.records, 2) if self.records else 0.0,
+            "records_with_issues": self.records_with_issues,
+            "score_distribution": {
+                str(score): count for score, count in enumerate(self.score_histogram) if count
+            },
+            "check_failures": dict(self.check_failures),
+            "by_city": self._group_rows(self.by_city),
+            "by_specialty": self._group_rows(self.by_specialty),
+            "timing_ms": timing,
+        }
+
+    def write_json_report(self, path):
+        """
+        Write the summary report as JSON.
+
+        Args:
+            path (str): Destination file
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_csv_report(self, path):
+        """
+        Write the summary report as a long-format CSV (section, name, metric, value).
+
+        Args:
+            path (str): Destination file
+        """
+        summary = self.summary()
+
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["section", "name", "metric", "value"])
+
+            for metric in ("records", "average_score", "records_with_issues"):
+                writer.writerow(["overall", "", metric, summary[metric]])
+            for score, count in summary["score_distribution"].items():
+                writer.writerow(["score_distribution", score, "records", count])
+            for check, count in summary["check_failures"].items():
+                writer.writerow(["check_failures", check, "failures", count])
+            for section in ("by_city", "by_specialty"):
+                for row in summary[section]:
+                    for metric in ("records", "average_score", "records_with_issues"):
+                        writer.writerow([section, row["name"], metric, row[metric]])
+            for metric, value in summary["timing_ms"].items():
+                writer.writerow(["timing_ms", "", metric, value])
+
+
+# ============================================================================
+# STREAMING DRIVER
+# ============================================================================
+
+def aggregate_validation(records, aggregator=None, validate=agent_1_validation, on_result=None):
+    """
+    Validate records one at a time and fold each result into an aggregator.
+
+    Nothing per-record is retained; pass on_result to stream results elsewhere.
+
+    Args:
+        records (iterable): Provider records (dicts)
+        aggregator (ValidationAggregator): Aggregator to update (new one if None)
+        validate (callable): Per-record validator (defaults to Agent 1)
+        on_result (callable): Called with (record, result) for each record
+
+    Returns:
+        ValidationAggregator: The updated aggregator
+    """
+    aggregator = aggregator or ValidationAggregator()
+    for record in records:
+        start_time = time.perf_counter()
+        result = validate(record)
+        aggregator.update(record, result, time.perf_counter() - start_time)
+        if on_result is not None:
+            on_result(record, result)
+    return aggregator
+
+
+def _self_check(rows=20_000, shards=4, seed=42):
+    """
+    Check that shard aggregates merge into exactly the single-pass aggregate.
+    """
+    import random
+
+    from sample_providers import generate_providers
+
+    records = list(generate_providers(rows, seed))
+    results = [agent_1_validation(record) for record in records]
+
+    single = ValidationAggregator()
+    for record, result in zip(records, results):
+        single.update(record, result)
+
+    # Shard, ship each shard through to_dict/from_dict as workers do, merge
+    merged = ValidationAggregator()
+    step = -(-rows // shards)
+    for start in range(0, rows, step):
+        shard = ValidationAggregator()
+        for record, result in zip(records[start:start + step], results[start:start + step]):
+            shard.update(record, result)
+        merged.merge(ValidationAggregator.from_dict(json.loads(json.dumps(shard.to_dict()))))
+
+    assert merged.summary() == single.summary(), "Merged shards differ from the single pass"
+    assert merged.records == rows and sum(merged.score_histogram) == rows
+    print(f"  ✓ {shards} merged shards == single pass over {rows:,} records")
+
+    # Timing percentiles come from measured durations, not the rounded field
+    timing = aggregate_validation(records).summary()["timing_ms"]
+    assert timing["p50"] < timing["p99"], timing
+    assert len({timing["p50"], timing["p90"], timing["p99"]}) > 1, timing
+    print(f"  ✓ Timing percentiles resolved (p50={timing['p50']} ms, p99={timing['p99']} ms)")
+
+    # Specialty breakdown keeps approved names as listed
+    approved = {name.casefold(): name for name in current_snapshot().specialties}
+    for row in single.summary()["by_specialty"]:
+        assert approved.get(row["name"].casefold(), row["name"]) == row["name"], row["name"]
+    assert canonical_specialty(" ent ") == "ENT"
+    assert canonical_specialty("OBSTETRICS AND GYNECOLOGY") == "Obstetrics and Gynecology"
+    print("  ✓ Specialty breakdown uses canonical names")
+
+    # DDSketch quantiles stay within the relative accuracy, merged or not
+    rng = random.Random(seed)
+    values = [rng.lognormvariate(0, 2) for _ in range(50_000)]
+    whole, left, right = DDSketch(), DDSketch(), DDSketch()
+    for position, value in enumerate(values):
+        whole.add(value)
+        (left if position % 2 else right).add(value)
+    left.merge(right)
+    ordered = sorted(values)
+    for q in (0.01, 0.5, 0.9, 0.99, 0.999):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        for sketch in (whole, left):
+            assert abs(sketch.quantile(q) - exact) <= DEFAULT_RELATIVE_ACCURACY * exact * 1.0001, q
+    assert (left.bins, left.zero_count, left.count) == (whole.bins, whole.zero_count, whole.count), \
+        "Merged sketch buckets differ from single sketch"
+    assert math.isclose(left.total, whole.total)    # float sum; only the order differs
+    assert DDSketch.from_dict(whole.to_dict()).to_dict() == whole.to_dict()
+    print(f"  ✓ DDSketch within {DEFAULT_RELATIVE_ACCURACY:.0%} relative error and merges exactly")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a provider CSV and write summary reports")
+    parser.add_argument("path", nargs="?", help="Provider CSV file (omit to run the built-in self-check)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write the JSON summary here")
+    parser.add_argument("--csv", dest="csv_path", default=None, help="Write the CSV summary here")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.path is None:
+        _self_check()
+        return
+
+    with profile_run(args):
+        with open(args.path, newline="", encoding="utf-8") as f:
+            aggregator = aggregate_validation(csv.DictReader(f))
+
+        if args.json_path:
+            aggregator.write_json_report(args.json_path)
+        if args.csv_path:
+            aggregator.write_csv_report(args.csv_path)
+    if not (args.json_path or args.csv_path):
+        print(json.dumps(aggregator.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+# benchmarks.py
+"""
+MedVerify AI - Benchmark Suite
+Throughput benchmarks for the lookup validators, Agent 1 and the batch,
+parallel and end-to-end file paths, with JSON baselines for regression checks
+
+Usage:
+    python benchmarks.py --save-baseline benchmark_baseline.json   # record
+    python benchmarks.py --compare benchmark_baseline.json         # check (exit 1 on regression)
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from agents import agent_1_validation
+from lookup_tables import (
+    all_required_fields_present,
+    current_snapshot,
+    is_valid_indian_phone,
+    is_valid_pincode,
+    matches_reg_pattern,
+    standardize_city,
+)
+from provider_record import ProviderRecord
+from sample_providers import generate_providers, write_providers_csv
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_SECONDS = 0.2           # each timed sample loops a case until it runs this long
+DEFAULT_THRESHOLD = 0.10            # fail if throughput drops more than 10% below baseline
+MICRO_SAMPLE = 10_000               # records per validator / per-record Agent 1 run
+BASELINE_FORMAT_VERSION = 2         # 2: warm-up plus autoranged samples
+GROUPS = ("validators", "agent", "batch", "parallel", "end_to_end")
+
+# Allowed throughput drop per group. Pure-Python loops are stable to a few
+# percent; cases that start processes or touch the disk swing more between
+# runs on the same machine.
+GROUP_THRESHOLDS = {
+    "validators": 0.10,
+    "agent": 0.10,
+    "batch": 0.15,
+    "parallel": 0.25,
+    "end_to_end": 0.20,
+}
+
+
+# ============================================================================
+# BENCHMARK CASES
+# ============================================================================
+# Each case builds its inputs (untimed) and returns (operations, run); the
+# runner times run() and reports operations per second.
+
+def _micro_cases(records):
+    """Validators from lookup_tables.py and Agent 1 per record."""
+    phones = [record["phone"] for record in records]
+    pincodes = [record["pincode"] for record in records]
+    registrations = [record["registration_no"] for record in records]
+    cities = [(record["city"], record["pincode"]) for record in records]
+    # standardize_city is memoized and the sample repeats ~90 (city, pincode)
+    # pairs, so time the undecorated function rather than cache hits
+    standardize = standardize_city.__wrapped__
+    provider_records = [ProviderRecord.from_dict(record) for record in records]
+
+    def loop(func, values):
+        return lambda: [func(value) for value in values]
+
+    return {
+        "validators.is_valid_indian_phone": ("validators", len(phones), loop(is_valid_indian_phone, phones)),
+        "validators.is_valid_pincode": ("validators", len(pincodes), loop(is_valid_pincode, pincodes)),
+        "validators.matches_reg_pattern": ("validators", len(registrations), loop(matches_reg_pattern, registrations)),
+        "validators.all_required_fields_present": (
+            "validators", len(records), loop(all_required_fields_present, records)),
+        "validators.standardize_city": (
+            "validators", len(cities),
+            lambda: [standardize(current_snapshot(), city, pincode) for city, pincode in cities]),
+        "agent.agent_1_validation.dict": ("agent", len(records), loop(agent_1_validation, records)),
+        "agent.agent_1_validation.provider_record": (
+            "agent", len(provider_records), loop(agent_1_validation, provider_records)),
+    }
+
+
+def _batch_case(path, rows):
+    import batch_validation
+
+    df = batch_validation.load_providers(path)
+    return rows, lambda: batch_validation.validate_dataframe(df)
+
+
+def _parallel_case(path, rows):
+    import distributed
+
+    workers = os.cpu_count() or 1
+    return rows, lambda: distributed.run_local(path, workers=workers)
+
+
+def _stream_case(path, rows):
+    import validation_service
+
+    def run():
+        with open(path, newline="", encoding="utf-8") as input_file, \
+                tempfile.TemporaryFile("w+", encoding="utf-8") as output_file:
+            aggregator = validation_service.validate_csv_stream(input_file, output_file)
+            aggregator.write_json_report(os.devnull)
+
+    return rows, run
+
+
+def _batch_file_case(path, rows):
+    import batch_validation
+
+    return rows, lambda: batch_validation.validate_file(path)
+
+
+SIZED_CASES = {
+    "batch.validate_dataframe": ("batch", _batch_case),
+    "parallel.distributed_local": ("parallel", _parallel_case),
+    "end_to_end.stream_file": ("end_to_end", _stream_case),
+    "end_to_end.batch_file": ("end_to_end", _batch_file_case),
+}
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def _time_loops(run, loops):
+    """Seconds for loops calls, with the cyclic GC paused as timeit does."""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start_time = time.perf_counter()
+        for _ in range(loops):
+            run()
+        return time.perf_counter() - start_time
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _autorange(run, min_seconds):
+    """Smallest loop count in 1, 2, 5, 10, 20, ... taking at least min_seconds (as timeit)."""
+    scale = 1
+    while True:
+        for factor in (1, 2, 5):
+            loops = scale * factor
+            elapsed = _time_loops(run, loops)
+            if elapsed >= min_seconds:
+                return loops, elapsed
+        scale *= 10
+
+
+def _time_best(run, repeat, min_seconds=DEFAULT_MIN_SECONDS):
+    """
+    Best per-call time of a case, timeit style.
+
+    One untimed warm-up call absorbs imports, cache fills and cold pages.
+    The loop count then grows 1, 2, 5, 10, 20, ... until a sample takes at
+    least min_seconds, so millisecond cases are not timed off a single call,
+    and the best of repeat samples is kept (least disturbed by other load).
+
+    Returns:
+        tuple: (seconds per call, calls per sample)
+    """
+    run()
+
+    loops, best = _autorange(run, min_seconds)
+    for _ in range(repeat - 1):
+        best = min(best, _time_loops(run, loops))
+    return best / loops, loops
+
+
+def _record(results, name, group, operations, timing, size=None):
+    seconds, loops = timing
+    results[name] = {
+        "group": group,
+        "size": size,
+        "operations": operations,
+        "seconds": round(seconds, 6),
+        "loops": loops,
+        "ops_per_second": round(operations / seconds, 1) if seconds else None,
+    }
+    print(f"  {name:58} {results[name]['ops_per_second']:>14,.1f} ops/s")
+
+
+def run_benchmarks(groups=GROUPS, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=42,
+                   min_seconds=DEFAULT_MIN_SECONDS):
+    """
+    Run the benchmark suite.
+
+    Args:
+        groups (iterable): Groups from GROUPS to run
+        sizes (iterable): Row counts for the batch, parallel and end-to-end cases
+        repeat (int): Timed samples per case (best is kept)
+        seed (int): Synthetic directory seed
+        min_seconds (float): Minimum duration of one timed sample
+
+    Returns:
+        dict: {'metadata': {...}, 'results': {case name: {...}}}
+    """
+    groups = set(groups)
+    results = {}
+
+    if groups & {"validators", "agent"}:
+        records = [{field: str(value) for field, value in record.items()}
+                   for record in generate_providers(MICRO_SAMPLE, seed)]
+        for name, (group, operations, run) in _micro_cases(records).items():
+            if group in groups:
+                _record(results, name, group, operations, _time_best(run, repeat, min_seconds))
+
+    sized = {name: case for name, case in SIZED_CASES.items() if case[0] in groups}
+    if sized:
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in sizes:
+                path = os.path.join(tmp, f"providers_{rows}.csv")
+                write_providers_csv(path, rows, seed)
+                for name, (group, build) in sized.items():
+                    operations, run = build(path, rows)
+                    _record(results, f"{name}[{rows}]", group, operations,
+                            _time_best(run, repeat, min_seconds), size=rows)
+                os.remove(path)
+
+    return {
+        "metadata": {
+            "format_version": BASELINE_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "min_seconds": min_seconds,
+            "groups": sorted(groups),
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+# ============================================================================
+# BASELINES
+# ============================================================================
+
+def save_baseline(run, path):
+    """
+    Write benchmark results as a JSON baseline.
+
+    Args:
+        run (dict): Output of run_benchmarks()
+        path (str): Destination file
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(run, baseline, threshold=None):
+    """
+    Compare throughput with a baseline.
+
+    Args:
+        run (dict): Output of run_benchmarks()
+        baseline (dict): Previously saved run
+        threshold (float): Allowed fractional drop in ops/s (0.10 = 10%) for
+            every case; None uses GROUP_THRESHOLDS
+
+    Returns:
+        tuple: (rows, missing)
+            rows: One row per case present in both runs: {
+                'name', 'baseline_ops_per_second', 'ops_per_second',
+                'change' (fraction, negative = slower), 'threshold',
+                'regressed' (bool)
+            }
+            missing: Baseline cases this run should have produced but did
+                not (renamed or removed); cases from groups or sizes that
+                were not selected are not counted
+    """
+    groups = set(run["metadata"].get("groups", GROUPS))
+    sizes = set(run["metadata"].get("sizes", ()))
+    missing = sorted(
+        name for name, reference in baseline.get("results", {}).items()
+        if name not in run["results"]
+        and reference.get("group") in groups
+        and (reference.get("size") is None or reference.get("size") in sizes)
+    )
+
+    rows = []
+    for name, current in run["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference.get("ops_per_second") or current["ops_per_second"] is None:
+            continue
+
+        allowed = threshold if threshold is not None else GROUP_THRESHOLDS.get(current["group"], DEFAULT_THRESHOLD)
+        change = current["ops_per_second"] / reference["ops_per_second"] - 1
+        rows.append({
+            "name": name,
+            "baseline_ops_per_second": reference["ops_per_second"],
+            "ops_per_second": current["ops_per_second"],
+            "change": round(change, 4),
+            "threshold": allowed,
+            "regressed": change < -allowed,
+        })
+    return rows, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MedVerify AI benchmark suite")
+    parser.add_argument("--groups", default=",".join(GROUPS),
+                        help=f"Comma-separated groups to run (default: {','.join(GROUPS)})")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated row counts for batch/parallel/end-to-end cases")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed samples per case (best is kept)")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help="Minimum duration of one timed sample (short cases are looped)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write this run's results as JSON")
+    parser.add_argument("--save-baseline", default=None, help="Write this run as the baseline file")
+    parser.add_argument("--compare", default=None, help="Baseline file to check this run against")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Allowed throughput drop before failing, for every case "
+                             "(fraction; default: per group, see GROUP_THRESHOLDS)")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Do not fail when baseline cases are missing from this run")
+    args = parser.parse_args(argv)
+
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown group(s): {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    print("\n" + "=" * 70)
+    print("MEDVERIFY AI - BENCHMARK SUITE")
+    print("=" * 70)
+    run = run_benchmarks(groups, sizes, args.repeat, args.seed, args.min_seconds)
+
+    if args.output:
+        save_baseline(run, args.output)
+    if args.save_baseline:
+        save_baseline(run, args.save_baseline)
+        print(f"\n  Baseline written to {args.save_baseline}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows, missing = compare_to_baseline(run, baseline, args.threshold)
+
+    if baseline.get("metadata", {}).get("format_version") != BASELINE_FORMAT_VERSION:
+        print(f"\n  ! Baseline was timed with format version "
+              f"{baseline.get('metadata', {}).get('format_version')} (now {BASELINE_FORMAT_VERSION}); "
+              "re-record it with --save-baseline")
+    for key in ("platform", "cpu_count", "python"):
+        recorded = baseline.get("metadata", {}).get(key)
+        if recorded != run["metadata"][key]:
+            print(f"\n  ! Baseline {key} differs ({recorded} vs {run['metadata'][key]}); "
+                  "compare runs from the same machine")
+
+    print("\n" + "-" * 70)
+    if args.threshold is None:
+        print(f"COMPARISON WITH {args.compare} (per-group thresholds)")
+    else:
+        print(f"COMPARISON WITH {args.compare} (threshold -{args.threshold:.0%})")
+    print("-" * 70)
+    for row in rows:
+        marker = "✗" if row["regressed"] else " "
+        print(f"  {marker} {row['name']:56} {row['baseline_ops_per_second']:>14,.1f} -> "
+              f"{row['ops_per_second']:>14,.1f} ops/s ({row['change']:+.1%}, limit -{row['threshold']:.0%})")
+
+    for name in missing:
+        print(f"  ? {name:56} missing from this run")
+
+    regressions = [row["name"] for row in rows if row["regressed"]]
+    failed = False
+    if regressions:
+        print(f"\n  ✗ {len(regressions)} regression(s): {', '.join(regressions)}")
+        failed = True
+    if missing and not args.allow_missing:
+        print(f"\n  ✗ {len(missing)} baseline case(s) missing (renamed or removed?); "
+              "pass --allow-missing to accept")
+        failed = True
+    if failed:
+        return 1
+    print(f"\n  ✓ No regressions across {len(rows)} case(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,626 @@
+# distributed.py
+"""
+MedVerify AI - Distributed Validation
+Coordinator/worker mode that shards a provider file across several nodes
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import selectors
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+
+from agents import agent_1_validation, use_registry_index
+from aggregation import ValidationAggregator
+from lookup_tables import start_lookup_reloader
+from profiling import SamplingProfiler, add_profile_arguments, print_report, profile_run
+from provider_record import ProviderRecord
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# The coordinator splits the provider CSV into byte ranges aligned to line
+# boundaries. Workers need the same file at the same path (shared storage or
+# a copy on every node); only shard offsets and results travel over TCP.
+#
+# Note: byte-range sharding assumes one record per line (no quoted newlines),
+# which holds for every directory export we produce.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+DEFAULT_SHARD_BYTES = 8 * 1024 * 1024   # 8 MB per shard
+RESULT_BATCH_SIZE = 500                 # records per 'results' or 'heartbeat' message
+WORKER_TIMEOUT = 60.0                   # seconds of silence before a worker is presumed dead
+CONNECT_TIMEOUT = 30.0                  # seconds a worker keeps retrying the coordinator
+MAX_SHARD_ATTEMPTS = 3                  # failed hand-outs of one shard before the run is aborted
+
+
+# ============================================================================
+# WIRE PROTOCOL - newline-delimited JSON over TCP
+# ============================================================================
+# worker      -> coordinator : {"type": "hello", "worker": "<host>:<pid>"}
+# coordinator -> worker      : {"type": "shard", "shard_id", "path", "start", "end", "header", "want_results"}
+# worker      -> coordinator : {"type": "results", "shard_id", "records": [...]}   (0..n times, want_results)
+# worker      -> coordinator : {"type": "heartbeat", "shard_id", "records": n}     (0..n times, otherwise)
+# worker      -> coordinator : {"type": "shard_done", "shard_id", "aggregate": ValidationAggregator.to_dict()}
+# coordinator -> worker      : {"type": "done"}
+
+def _send_message(stream, message, flush=True):
+    """
+    Write one protocol message to a socket file.
+
+    Args:
+        stream: Binary file object from socket.makefile('rwb')
+        message (dict): JSON-serializable message
+        flush (bool): Flush the socket buffer after writing
+    """
+    stream.write((json.dumps(message) + "\n").encode("utf-8"))
+    if flush:
+        stream.flush()
+
+
+def _read_message(stream):
+    """
+    Read one protocol message from a socket file.
+
+    Args:
+        stream: Binary file object from socket.makefile('rwb')
+
+    Returns:
+        dict: Decoded message
+
+    Raises:
+        ConnectionError: If the peer closed the connection
+    """
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Peer closed the connection")
+    return json.loads(line)
+
+
+# ============================================================================
+# SHARDING
+# ============================================================================
+
+def plan_shards(path, num_shards=None, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Split a provider CSV into byte-range shards aligned to line boundaries.
+
+    Args:
+        path (str): Provider CSV file
+        num_shards (int): Target number of shards (overrides shard_bytes)
+        shard_bytes (int): Target shard size in bytes
+
+    Returns:
+        tuple: (header line as str, list of {'shard_id', 'start', 'end'} dicts)
+    """
+    size = os.path.getsize(path)
+    shards = []
+
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8").rstrip("\r\n")
+        data_start = f.tell()
+
+        if num_shards:
+            shard_bytes = math.ceil((size - data_start) / num_shards)
+        shard_bytes = max(1, shard_bytes)
+
+        start = data_start
+        while start < size:
+            target = start + shard_bytes
+            if target >= size:
+                end = size
+            else:
+                # Finish the line containing byte target-1, so a shard that
+                # already ends on a newline is not extended by a full line
+                f.seek(target - 1)
+                f.readline()
+                end = f.tell()
+            shards.append({"shard_id": len(shards), "start": start, "end": end})
+            start = end
+
+    return header, shards
+
+
+def read_shard(path, header, start, end):
+    """
+    Stream provider records from one byte range of a CSV file.
+
+    Args:
+        path (str): Provider CSV file
+        header (str): Header line of the file
+        start (int): First byte of the shard (a line start)
+        end (int): Byte offset just past the shard
+
+    Yields:
+        ProviderRecord: One provider record per data line
+    """
+    fieldnames = next(csv.reader([header]))
+
+    def _lines():
+        with open(path, "rb") as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                line = f.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line.decode("utf-8")
+
+    yield from ProviderRecord.from_csv_rows(csv.reader(_lines()), header=fieldnames)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def _connect(host, port, connect_timeout):
+    """
+    Connect to the coordinator, retrying until connect_timeout expires.
+    """
+    deadline = time.time() + connect_timeout
+    while True:
+        try:
+            return socket.create_connection((host, port), timeout=connect_timeout)
+        except OSError:
+            if time.time() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def run_worker(host=DEFAULT_HOST, port=DEFAULT_PORT, validate=agent_1_validation,
+               connect_timeout=CONNECT_TIMEOUT):
+    """
+    Run a validation worker until the coordinator has no shards left.
+
+    Args:
+        host (str): Coordinator host
+        port (int): Coordinator port
+        validate (callable): Per-record validator (defaults to Agent 1)
+        connect_timeout (float): Seconds to keep retrying the initial connection
+
+    Returns:
+        int: Number of shards this worker completed
+    """
+    completed = 0
+    sock = _connect(host, port, connect_timeout)
+    sock.settimeout(None)
+
+    # The coordinator may have timed this worker out and closed the socket
+    # (its shard goes to another worker), so any send or read can fail
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            _send_message(stream, {"type": "hello", "worker": f"{socket.gethostname()}:{os.getpid()}"})
+
+            while True:
+                message = _read_message(stream)
+
+                if message["type"] == "done":
+                    break
+                if message["type"] != "shard":
+                    continue
+
+                shard_id = message["shard_id"]
+                want_results = message.get("want_results", True)
+                aggregator = ValidationAggregator()
+                batch = []
+                pending = 0
+
+                for record in read_shard(message["path"], message["header"], message["start"], message["end"]):
+                    start_time = time.perf_counter()
+                    result = validate(record)
+                    aggregator.update(record, result, time.perf_counter() - start_time)
+                    if want_results:
+                        batch.append({"id": record.id, **result})
+                    pending += 1
+
+                    if pending >= RESULT_BATCH_SIZE:
+                        # Each batch doubles as a heartbeat for the coordinator;
+                        # without a results sink only the count is sent
+                        if want_results:
+                            _send_message(stream, {"type": "results", "shard_id": shard_id, "records": batch})
+                            batch = []
+                        else:
+                            _send_message(stream, {"type": "heartbeat", "shard_id": shard_id, "records": pending})
+                        pending = 0
+
+                if batch:
+                    _send_message(stream, {"type": "results", "shard_id": shard_id, "records": batch}, flush=False)
+                _send_message(stream, {"type": "shard_done", "shard_id": shard_id, "aggregate": aggregator.to_dict()})
+                completed += 1
+    except ConnectionError:     # includes BrokenPipeError and ConnectionResetError
+        pass
+
+    return completed
+
+
+# ============================================================================
+# COORDINATOR
+# ============================================================================
+
+class Coordinator:
+    """
+    Hand out shards of a provider file to TCP workers and merge their
+    per-shard ValidationAggregators.
+
+    A shard is committed only when its worker reports 'shard_done'. If a worker
+    disconnects, stays silent for longer than worker_timeout or sends a message
+    the coordinator cannot use, its in-flight shard goes back on the queue and
+    is handed to the next idle worker, so every record is counted exactly once.
+    A shard that fails max_attempts times (e.g. undecodable bytes that crash
+    every worker) aborts the run instead of being retried forever.
+    """
+
+    def __init__(self, path, host=DEFAULT_HOST, port=DEFAULT_PORT, num_shards=None,
+                 shard_bytes=DEFAULT_SHARD_BYTES, worker_timeout=WORKER_TIMEOUT, on_results=None,
+                 max_attempts=MAX_SHARD_ATTEMPTS):
+        """
+        Args:
+            path (str): Provider CSV file (must be readable by every worker)
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free port)
+            num_shards (int): Target number of shards (overrides shard_bytes)
+            shard_bytes (int): Target shard size in bytes
+            worker_timeout (float): Seconds of silence before a worker is presumed dead
+            on_results (callable): Called with the list of per-record results
+                of each committed shard (workers only send per-record results
+                when this is set)
+            max_attempts (int): Failed hand-outs of one shard before serve() gives up
+        """
+        self.path = os.path.abspath(path)
+        self.worker_timeout = worker_timeout
+        self.on_results = on_results
+        self.max_attempts = max_attempts
+
+        self.header, self.shards = plan_shards(self.path, num_shards=num_shards, shard_bytes=shard_bytes)
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)   # shard queued, committed or run aborted
+        self._pending = deque(self.shards)
+        self._completed = {}
+        self._failures = {}
+        self._error = None
+        self._done = threading.Event()
+        self._workers = set()
+        self.reassigned = 0
+        self.aggregator = None
+
+        self._listener = socket.create_server((host, port))
+        self._listener.setblocking(False)
+        self.address = self._listener.getsockname()[:2]
+
+        # Written to when the run ends so serve() stops accepting immediately
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+
+        if not self.shards:
+            self._finish()
+
+    # ------------------------------------------------------------------
+    # Shard bookkeeping
+    # ------------------------------------------------------------------
+
+    def _finish(self, error=None):
+        """Mark the run over (called with self._lock held, or before serving)."""
+        if self._done.is_set():
+            return
+        self._error = error
+        self._wakeup_send.send(b"\0")     # before _done, so serve() cannot have closed it yet
+        self._done.set()
+        self._changed.notify_all()
+
+    def _next_shard(self):
+        """Block until a shard is available; None once the run is over."""
+        with self._changed:
+            while not self._pending and not self._done.is_set():
+                self._changed.wait()
+            if self._done.is_set():
+                return None
+            return self._pending.popleft()
+
+    def _commit(self, shard, aggregate, results):
+        # Decode outside the lock; a malformed aggregate raises to the caller
+        aggregator = ValidationAggregator.from_dict(aggregate)
+        with self._lock:
+            shard_id = shard["shard_id"]
+            if shard_id in self._completed or self._done.is_set():
+                return  # Late duplicate from a worker we already gave up on
+            self._completed[shard_id] = aggregator
+            if self.on_results is not None:
+                self.on_results(results)
+            if len(self._completed) == len(self.shards):
+                self._finish()
+
+    def _requeue(self, shard, reason):
+        with self._changed:
+            shard_id = shard["shard_id"]
+            if shard_id in self._completed or self._done.is_set():
+                return
+            self._failures[shard_id] = self._failures.get(shard_id, 0) + 1
+            if self._failures[shard_id] >= self.max_attempts:
+                self._finish(RuntimeError(
+                    f"Shard {shard_id} (bytes {shard['start']}-{shard['end']} of {self.path}) "
+                    f"failed {self._failures[shard_id]} times, last error: {reason!r}"
+                ))
+                return
+            self.reassigned += 1
+            self._pending.append(shard)
+            self._changed.notify()
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _handle_worker(self, conn):
+        shard = None
+        conn.settimeout(self.worker_timeout)
+
+        try:
+            with conn, conn.makefile("rwb") as stream:
+                hello = _read_message(stream)
+                with self._lock:
+                    self._workers.add(hello.get("worker", "unknown"))
+
+                while True:
+                    shard = self._next_shard()
+                    if shard is None:
+                        break
+
+                    _send_message(stream, {"type": "shard", "path": self.path, "header": self.header,
+                                           "want_results": self.on_results is not None, **shard})
+                    results = []
+
+                    while True:
+                        message = _read_message(stream)
+                        if message["type"] == "results":
+                            if self.on_results is not None:
+                                results.extend(message["records"])
+                        elif message["type"] == "shard_done":
+                            self._commit(shard, message["aggregate"], results)
+                            shard = None
+                            break
+
+                _send_message(stream, {"type": "done"})
+        except Exception as exc:
+            # Dead, silent or misbehaving worker (including payloads of the
+            # wrong shape): put its shard back so the run cannot hang on it
+            if shard is not None:
+                self._requeue(shard, exc)
+
+    def serve(self):
+        """
+        Accept workers until every shard has been committed.
+
+        The merged ValidationAggregator is kept on self.aggregator for
+        report writing.
+
+        Returns:
+            dict: {
+                'aggregate': summary of the merged aggregator,
+                'shards': int,
+                'reassigned': int (shard hand-outs that had to be retried),
+                'workers': int (distinct workers that connected),
+                'execution_time': float (seconds)
+            }
+
+        Raises:
+            RuntimeError: If a shard failed max_attempts times
+        """
+        start_time = time.time()
+        handlers = []
+
+        selector = selectors.DefaultSelector()
+        selector.register(self._listener, selectors.EVENT_READ)
+        selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+        try:
+            while not self._done.is_set():
+                for key, _ in selector.select():
+                    if key.fileobj is not self._listener:
+                        continue
+                    try:
+                        conn, _ = self._listener.accept()
+                    except BlockingIOError:
+                        continue
+                    conn.setblocking(True)
+                    handler = threading.Thread(target=self._handle_worker, args=(conn,), daemon=True)
+                    handler.start()
+                    handlers.append(handler)
+        finally:
+            selector.close()
+            self._listener.close()
+            self._wakeup_recv.close()
+            self._wakeup_send.close()
+
+        for handler in handlers:
+            handler.join(timeout=1.0)
+
+        if self._error is not None:
+            raise self._error
+
+        self.aggregator = ValidationAggregator()
+        for shard in self.shards:
+            self.aggregator.merge(self._completed[shard["shard_id"]])
+
+        return {
+            "aggregate": self.aggregator.summary(),
+            "shards": len(self.shards),
+            "reassigned": self.reassigned,
+            "workers": len(self._workers),
+            "execution_time": round(time.time() - start_time, 3),
+        }
+
+
+# ============================================================================
+# LOCALHOST HELPER
+# ============================================================================
+
+def _run_profiled_worker(host, port, profile_output, profile_interval):
+    """run_worker() under a SamplingProfiler, writing its report to profile_output."""
+    profiler = SamplingProfiler(profile_interval)
+    with profiler.profile_thread():
+        run_worker(host, port)
+    profiler.stop()
+    profiler.write_report(profile_output)
+
+
+def serve_local(coordinator, workers=4, profiler=None):
+    """
+    Serve a coordinator with worker processes spawned on this machine.
+
+    Args:
+        coordinator (Coordinator): Coordinator listening on a local address
+        workers (int): Number of worker processes
+        profiler (SamplingProfiler): If given, every worker profiles itself
+            and the worker profiles are merged into this one
+
+    Returns:
+        dict: Summary from Coordinator.serve()
+    """
+    host, port = coordinator.address
+    with tempfile.TemporaryDirectory() as profile_dir:
+        processes = []
+        for index in range(workers):
+            if profiler is None:
+                target, args = run_worker, (host, port)
+            else:
+                prefix = os.path.join(profile_dir, f"worker-{index}")
+                target, args = _run_profiled_worker, (host, port, prefix, profiler.interval)
+            processes.append(multiprocessing.Process(target=target, args=args, daemon=True))
+        for process in processes:
+            process.start()
+
+        try:
+            return coordinator.serve()
+        finally:
+            for process in processes:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+            if profiler is not None:
+                for index in range(workers):
+                    prefix = os.path.join(profile_dir, f"worker-{index}")
+                    if os.path.exists(f"{prefix}.json"):
+                        profiler.merge_report(prefix)
+
+
+def run_local(path, workers=4, num_shards=None, on_results=None):
+    """
+    Run a coordinator plus worker processes on localhost.
+
+    Args:
+        path (str): Provider CSV file
+        workers (int): Number of worker processes
+        num_shards (int): Number of shards (defaults to 4 per worker)
+        on_results (callable): See Coordinator
+
+    Returns:
+        dict: Summary from Coordinator.serve()
+    """
+    if num_shards is None:
+        num_shards = workers * 4
+
+    coordinator = Coordinator(path, host=DEFAULT_HOST, port=0, num_shards=num_shards, on_results=on_results)
+    return serve_local(coordinator, workers)
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def _jsonl_writer(output_path):
+    """Return (on_results callback, file handle) appending results as JSON lines."""
+    handle = open(output_path, "w", encoding="utf-8")
+
+    def on_results(results):
+        for result in results:
+            handle.write(json.dumps(result) + "\n")
+
+    return on_results, handle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MedVerify AI distributed validation")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Shard a file and hand it to workers")
+    coordinator_parser.add_argument("path", help="Provider CSV file")
+    coordinator_parser.add_argument("--host", default="0.0.0.0")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--shards", type=int, default=None, help="Number of shards")
+    coordinator_parser.add_argument("--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES)
+    coordinator_parser.add_argument("--worker-timeout", type=float, default=WORKER_TIMEOUT)
+    coordinator_parser.add_argument("--max-attempts", type=int, default=MAX_SHARD_ATTEMPTS,
+                                    help="Failed hand-outs of one shard before the run is aborted")
+
+    worker_parser = subparsers.add_parser("worker", help="Validate shards handed out by a coordinator")
+    worker_parser.add_argument("--host", default=DEFAULT_HOST)
+    worker_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker_parser.add_argument("--lookup-tables", default=None,
+                               help="JSON lookup data file to hot-reload while the worker runs")
+    worker_parser.add_argument("--registry-index", default=None,
+                               help="Registry index to check registration numbers against")
+    add_profile_arguments(worker_parser)   # worker reports get a .<host>-<pid> suffix
+
+    local_parser = subparsers.add_parser("local", help="Coordinator plus N workers on this machine")
+    local_parser.add_argument("path", help="Provider CSV file")
+    local_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    local_parser.add_argument("--shards", type=int, default=None, help="Number of shards (default: 4 per worker)")
+
+    for run_parser in (coordinator_parser, local_parser):
+        run_parser.add_argument("--output", default=None, help="Write per-record results as JSON lines")
+        run_parser.add_argument("--report-json", default=None, help="Write the JSON summary report here")
+        run_parser.add_argument("--report-csv", default=None, help="Write the CSV summary report here")
+    add_profile_arguments(local_parser)    # merged profile of every worker process
+
+    args = parser.parse_args(argv)
+
+    if args.mode == "worker":
+        if args.lookup_tables:
+            start_lookup_reloader(args.lookup_tables)
+        if args.registry_index:
+            from registry_index import RegistryIndex
+            use_registry_index(RegistryIndex.open(args.registry_index))
+        args.profile_output = f"{args.profile_output}.{socket.gethostname()}-{os.getpid()}"
+        with profile_run(args):
+            completed = run_worker(args.host, args.port)
+        print(f"Worker finished {completed} shard(s)")
+        return
+
+    on_results, handle = _jsonl_writer(args.output) if args.output else (None, None)
+    try:
+        if args.mode == "coordinator":
+            coordinator = Coordinator(args.path, host=args.host, port=args.port, num_shards=args.shards,
+                                      shard_bytes=args.shard_bytes, worker_timeout=args.worker_timeout,
+                                      on_results=on_results, max_attempts=args.max_attempts)
+            print(f"Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]} "
+                  f"with {len(coordinator.shards)} shard(s)")
+            summary = coordinator.serve()
+        else:
+            coordinator = Coordinator(args.path, host=DEFAULT_HOST, port=0,
+                                      num_shards=args.shards or args.workers * 4, on_results=on_results)
+            profiler = SamplingProfiler(args.profile_interval) if args.profile else None
+            summary = serve_local(coordinator, workers=args.workers, profiler=profiler)
+            if profiler is not None:
+                print_report(profiler, args.profile_output)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    if args.report_json:
+        coordinator.aggregator.write_json_report(args.report_json)
+    if args.report_csv:
+        coordinator.aggregator.write_csv_report(args.report_csv)
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
 # lookup_tables.py
 
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import metrics
+
 # ============================================================================
 # SPECIALTY LIST - ~50 Common Indian Medical Specialties
 # ============================================================================
@@ -249,6 +258,342 @@ PINCODE_TO_CITY = {
 }
 
 
+# ============================================================================
+# VERSIONED SNAPSHOTS - Hot-reloadable lookup tables
+# ============================================================================
+# The constants above are the built-in defaults. Long-running services and
+# workers read the tables through current_snapshot(), which returns an
+# immutable LookupSnapshot. reload_lookup_tables() builds a new snapshot from
+# a JSON data file and swaps it in with a single reference assignment, so the
+# read path takes no locks and never sees a half-updated table.
+#
+# Data file format (every table is optional; omitted tables are kept):
+# {
+#     "version": "2026-10-01",
+#     "specialties": ["Cardiology", ...],
+#     "city_typos": {"Banaglore": "Bangalore", ...},
+#     "pincode_to_city": {"560001": "Bangalore", ...}
+# }
+
+LOOKUP_TABLE_NAMES = ("specialties", "city_typos", "pincode_to_city")
+_TABLE_TYPES = {"specialties": list, "city_typos": dict, "pincode_to_city": dict}
+
+
+def _table_version(table):
+    """
+    Content hash of one table, so unchanged tables keep their version.
+
+    Args:
+        table (list or dict): Table contents
+
+    Returns:
+        str: 12-character hex digest
+    """
+    if isinstance(table, (dict, MappingProxyType)):
+        table = dict(table)
+    payload = json.dumps(table, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+class LookupSnapshot:
+    """
+    Immutable, versioned set of lookup tables.
+
+    Attributes:
+        version (str): Data-file version (or "builtin")
+        generation (int): Increments on every swap within this process
+        specialties (tuple): Approved specialties
+        specialties_upper (frozenset): Upper-cased specialties for membership tests
+        city_typos (mapping): Misspelled city -> correct city (read-only)
+        pincode_to_city (mapping): Pincode -> city (read-only)
+        table_versions (mapping): Table name -> content hash (read-only)
+        source (str): Data file the snapshot was loaded from, if any
+    """
+
+    __slots__ = ("version", "generation", "specialties", "specialties_upper", "city_typos",
+                 "pincode_to_city", "table_versions", "source", "loaded_at")
+
+    def __init__(self, specialties, city_typos, pincode_to_city, version="builtin",
+                 generation=0, source=None):
+        specialties = tuple(str(s) for s in specialties)
+        city_typos = {str(k): str(v) for k, v in city_typos.items()}
+        pincode_to_city = {str(k): str(v) for k, v in pincode_to_city.items()}
+
+        fields = {
+            "version": str(version),
+            "generation": generation,
+            "specialties": specialties,
+            "specialties_upper": frozenset(s.strip().upper() for s in specialties),
+            "city_typos": MappingProxyType(city_typos),
+            "pincode_to_city": MappingProxyType(pincode_to_city),
+            "table_versions": MappingProxyType({
+                "specialties": _table_version(list(specialties)),
+                "city_typos": _table_version(city_typos),
+                "pincode_to_city": _table_version(pincode_to_city),
+            }),
+            "source": source,
+            "loaded_at": time.time(),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LookupSnapshot is immutable; use reload_lookup_tables()")
+
+    def __delattr__(self, name):
+        raise AttributeError("LookupSnapshot is immutable; use reload_lookup_tables()")
+
+    def __repr__(self):
+        return f"LookupSnapshot(version={self.version!r}, generation={self.generation})"
+
+
+_current_snapshot = LookupSnapshot(SPECIALTY_LIST, CITY_TYPOS, PINCODE_TO_CITY)
+_reload_lock = threading.Lock()
+_watched_mtimes = {}
+
+
+def current_snapshot():
+    """
+    Return the lookup tables currently in effect.
+
+    Callers should fetch the snapshot once per unit of work (record, batch)
+    and read every table from it, so a concurrent reload cannot mix versions.
+
+    Returns:
+        LookupSnapshot: Current snapshot
+    """
+    return _current_snapshot
+
+
+def _publish_snapshot_metrics(snapshot):
+    metrics.set_gauge("lookup_tables.version", snapshot.version)
+    metrics.set_gauge("lookup_tables.generation", snapshot.generation)
+    for table, table_version in snapshot.table_versions.items():
+        metrics.set_gauge(f"lookup_tables.table_version.{table}", table_version)
+
+
+def reload_lookup_tables(path):
+    """
+    Load lookup tables from a JSON data file and swap them in atomically.
+
+    Tables missing from the file are carried over from the current snapshot.
+    On any error the current snapshot stays in effect and the error is raised.
+
+    Args:
+        path (str): JSON data file (see format above)
+
+    Returns:
+        LookupSnapshot: The snapshot now in effect
+    """
+    global _current_snapshot
+
+    with _reload_lock:
+        start_time = time.perf_counter()
+        try:
+            with open(path, encoding="utf-8") as f:
+                # mtime of the content actually read, even if the file is replaced meanwhile
+                mtime = os.fstat(f.fileno()).st_mtime
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError(f"Lookup data file {path} must contain a JSON object")
+            for table, expected in _TABLE_TYPES.items():
+                if table in data and not isinstance(data[table], expected):
+                    raise ValueError(f"Lookup table '{table}' in {path} must be a JSON "
+                                     f"{'array' if expected is list else 'object'}")
+
+            previous = _current_snapshot
+            snapshot = LookupSnapshot(
+                data.get("specialties", previous.specialties),
+                data.get("city_typos", previous.city_typos),
+                data.get("pincode_to_city", previous.pincode_to_city),
+                version=data.get("version", os.path.basename(path)),
+                generation=previous.generation + 1,
+                source=os.path.abspath(path),
+            )
+        except (OSError, ValueError, AttributeError, TypeError):
+            metrics.increment("lookup_tables.reload_failures")
+            raise
+
+        _current_snapshot = snapshot
+        _watched_mtimes[snapshot.source] = mtime
+
+        metrics.observe("lookup_tables.reload_seconds", time.perf_counter() - start_time)
+        metrics.increment("lookup_tables.reloads")
+        _publish_snapshot_metrics(snapshot)
+
+    return snapshot
+
+
+def reload_if_changed(path):
+    """
+    Reload lookup tables only if the data file changed since the last load.
+
+    Args:
+        path (str): JSON data file
+
+    Returns:
+        bool: True if a new snapshot was swapped in
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        # Missing or unreadable file: a failed reload like any other
+        metrics.increment("lookup_tables.reload_failures")
+        raise
+    if _watched_mtimes.get(os.path.abspath(path)) == mtime:
+        return False
+    reload_lookup_tables(path)
+    return True
+
+
+def start_lookup_reloader(path, interval=30.0):
+    """
+    Poll a data file in a daemon thread and hot-reload it when it changes.
+
+    Reload errors are counted in metrics and the previous snapshot is kept.
+
+    Args:
+        path (str): JSON data file
+        interval (float): Seconds between checks
+
+    Returns:
+        threading.Event: Set it to stop the reloader
+    """
+    stop = threading.Event()
+
+    def _poll():
+        while not stop.is_set():
+            try:
+                reload_if_changed(path)
+            except (OSError, ValueError, AttributeError, TypeError):
+                pass  # Already counted in lookup_tables.reload_failures
+            stop.wait(interval)
+
+    threading.Thread(target=_poll, name="lookup-reloader", daemon=True).start()
+    return stop
+
+
+def export_lookup_tables(path, snapshot=None):
+    """
+    Write a snapshot as a JSON data file that reload_lookup_tables() accepts.
+
+    Args:
+        path (str): Destination file
+        snapshot (LookupSnapshot): Snapshot to export (defaults to current)
+    """
+    snapshot = snapshot or _current_snapshot
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": snapshot.version,
+            "specialties": list(snapshot.specialties),
+            "city_typos": dict(snapshot.city_typos),
+            "pincode_to_city": dict(snapshot.pincode_to_city),
+        }, f, indent=2, ensure_ascii=False)
+
+
+def cached_by_table_version(*tables, maxsize=4096):
+    """
+    Decorator: memoize a lookup helper until one of its tables changes.
+
+    The wrapped function receives the snapshot as its first argument. Each
+    cache is tagged with the versions of the tables it depends on, so a
+    reload that only changes pincode_to_city leaves specialty caches warm.
+
+    Args:
+        *tables (str): Names from LOOKUP_TABLE_NAMES the function reads
+        maxsize (int): Entries kept before the cache is cleared
+
+    Returns:
+        callable: Decorator
+    """
+    for table in tables:
+        if table not in LOOKUP_TABLE_NAMES:
+            raise ValueError(f"Unknown lookup table '{table}'")
+
+    def decorator(func):
+        # One (versions, cache) tuple, read and replaced as a unit, so a
+        # reader can never pair new versions with an old table's cache
+        state = {"entry": (None, {})}
+
+        def wrapper(*args):
+            snapshot = _current_snapshot
+            versions = tuple(snapshot.table_versions[table] for table in tables)
+
+            cached_versions, cache = state["entry"]
+            if cached_versions != versions:
+                # Swap in a fresh dict rather than clearing, so concurrent
+                # readers of the old cache never see it mutate underneath them
+                cache = {}
+                state["entry"] = (versions, cache)
+
+            try:
+                return cache[args]
+            except KeyError:
+                pass
+
+            value = func(snapshot, *args)
+            if len(cache) >= maxsize:
+                cache = {}
+                state["entry"] = (versions, cache)
+            cache[args] = value
+            return value
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.cache_state = state
+        wrapper.__wrapped__ = func      # uncached, takes the snapshot first
+        return wrapper
+
+    return decorator
+
+
+@cached_by_table_version("city_typos", "pincode_to_city")
+def standardize_city(snapshot, city, pincode=""):
+    """
+    Standardize a city name using the current snapshot.
+
+    Corrects known misspellings, then falls back to the pincode when the
+    city is empty.
+
+    Args:
+        city (str): City as entered
+        pincode (str): Pincode as entered
+
+    Returns:
+        str: Standardized city ("" if unknown)
+    """
+    city = str(city).strip() if city else ""
+    if city:
+        return snapshot.city_typos.get(city, city)
+    return snapshot.pincode_to_city.get(str(pincode).strip(), "")
+
+
+@cached_by_table_version("specialties")
+def canonical_specialty(snapshot, specialty):
+    """
+    Display name for a specialty, matched case-insensitively.
+
+    Approved specialties come back exactly as listed ("ENT", "Obstetrics and
+    Gynecology"); anything else is stripped and title-cased so spelling
+    variants of the same value still group together.
+
+    Args:
+        specialty (str): Specialty as entered
+
+    Returns:
+        str: Canonical name ("" if blank)
+    """
+    specialty = str(specialty).strip() if specialty else ""
+    key = specialty.casefold()
+    for approved in snapshot.specialties:
+        if approved.strip().casefold() == key:
+            return approved
+    return specialty.title()
+
+
+_publish_snapshot_metrics(_current_snapshot)
+
+
 # ============================================================================
 # PHONE VALIDATION - Indian phone number formats
 # ============================================================================
@@ -453,4 +798,59 @@ if __name__ == "__main__":
     
     for reg in test_regs:
         result = matches_reg_pattern(reg)
-        print(f"  {reg:20} -> {result}")
\ No newline at end of file
+        print(f"  {reg:20} -> {result}")
+
+
+    # Versioned snapshots: reload, carry-over, selective cache invalidation
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "lookup.json")
+        builtin = current_snapshot()
+        assert standardize_city("Banglore") == builtin.city_typos.get("Banglore", "Banglore")
+
+        # Reload only city_typos: other tables carry over, only city caches reset
+        city_cache = standardize_city.cache_state["entry"][1]
+        with open(data_path, "w", encoding="utf-8") as f:
+            json.dump({"version": "test-1", "city_typos": {"Bengaluru": "Bangalore"}}, f)
+        snapshot = reload_lookup_tables(data_path)
+        assert snapshot.version == "test-1" and snapshot.generation == builtin.generation + 1
+        assert snapshot.specialties == builtin.specialties
+        assert dict(snapshot.pincode_to_city) == dict(builtin.pincode_to_city)
+        assert snapshot.table_versions["specialties"] == builtin.table_versions["specialties"]
+        assert snapshot.table_versions["city_typos"] != builtin.table_versions["city_typos"]
+        assert standardize_city("Bengaluru") == "Bangalore"
+        assert standardize_city.cache_state["entry"][1] is not city_cache
+        assert not reload_if_changed(data_path), "Unchanged file must not reload"
+
+        # Metrics published by the reload
+        current_metrics = metrics.get_metrics()
+        assert current_metrics["counters"]["lookup_tables.reloads"] >= 1
+        assert current_metrics["gauges"]["lookup_tables.version"] == "test-1"
+
+        # Malformed tables are rejected and the snapshot in effect is kept
+        failures = current_metrics["counters"].get("lookup_tables.reload_failures", 0)
+        with open(data_path, "w", encoding="utf-8") as f:
+            json.dump({"version": "bad", "specialties": "Cardiology"}, f)
+        try:
+            reload_lookup_tables(data_path)
+            raise AssertionError("String specialties table was accepted")
+        except ValueError:
+            pass
+        assert current_snapshot() is snapshot
+        assert metrics.get_metrics()["counters"]["lookup_tables.reload_failures"] == failures + 1
+
+        # A data file that disappears is counted as a failure by the poller path too
+        try:
+            reload_if_changed(os.path.join(tmp, "missing.json"))
+            raise AssertionError("Missing data file was accepted")
+        except OSError:
+            pass
+        assert current_snapshot() is snapshot
+        assert metrics.get_metrics()["counters"]["lookup_tables.reload_failures"] == failures + 2
+
+        # Export round-trips through reload
+        export_lookup_tables(data_path, builtin)
+        assert reload_lookup_tables(data_path).table_versions == builtin.table_versions
+
+    print("  ✓ Lookup snapshot reload checks passed")
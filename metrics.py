@@ -0,0 +1,85 @@
+# metrics.py
+"""
+MedVerify AI - Runtime Metrics
+Minimal in-process counters, gauges and timings for long-running processes
+"""
+
+import threading
+
+# ============================================================================
+# METRIC STORE
+# ============================================================================
+# Metric names are dotted strings, e.g. "lookup_tables.reload_seconds".
+# Everything lives in this process; exporters read get_metrics().
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}
+
+
+def increment(name, value=1):
+    """
+    Add to a counter.
+
+    Args:
+        name (str): Metric name
+        value (int): Amount to add
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name, value):
+    """
+    Set a gauge to its current value (number or short string, e.g. a version).
+
+    Args:
+        name (str): Metric name
+        value: Current value
+    """
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, seconds):
+    """
+    Record one timing observation.
+
+    Args:
+        name (str): Metric name
+        seconds (float): Observed duration in seconds
+    """
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["last"] = seconds
+
+
+def get_metrics():
+    """
+    Snapshot every metric.
+
+    Returns:
+        dict: {'counters': {...}, 'gauges': {...}, 'timings': {...}}
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": {name: dict(timing) for name, timing in _timings.items()},
+        }
+
+
+def reset_metrics():
+    """
+    Clear every metric (used by tests and benchmarks).
+    """
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
@@ -0,0 +1,509 @@
+# registry_index.py
+"""
+MedVerify AI - Registration Number Registry Index
+Compact, memory-mapped membership filter for the national registration registry
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# A registry snapshot is a text file with one issued registration number per
+# line. build_registry_index() turns it into two files:
+#
+#   <index>          Bloom filter: magic + JSON header + bit array
+#   <index>.exact    Sorted, de-duplicated numbers, one per line
+#
+# Both are opened with mmap, so every worker process on a node shares the
+# same physical pages. A Bloom negative is definitive; a positive can be
+# confirmed by a binary search over the .exact file.
+#
+# At the default 0.1% false-positive rate 1.3M numbers need ~2.3 MB of
+# filter, against well over 100 MB for a Python set of strings.
+
+INDEX_MAGIC = b"MVREGBF1"
+INDEX_FORMAT_VERSION = 2
+# Index files persist and are shared, so bit positions must not depend on a
+# library version: blake2b of the UTF-8 value, 8-byte digest, little-endian
+HASH_SCHEME = "blake2b-64-v1"
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+BUILD_CHUNK_SIZE = 200_000
+EXACT_SUFFIX = ".exact"
+
+
+def normalize_registration_numbers(values):
+    """
+    Normalize registration numbers the way matches_reg_pattern does (strip, upper).
+
+    Args:
+        values (iterable or pd.Series): Raw registration numbers
+
+    Returns:
+        np.ndarray: Object array of normalized strings ('' for missing values)
+    """
+    series = pd.Series(values, dtype=object).fillna("").astype(str)
+    return series.str.strip().str.upper().to_numpy(dtype=object)
+
+
+def _hash_value(normalized):
+    """64-bit hash of one normalized value (stable across processes and versions)."""
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _hash_values(normalized):
+    """_hash_value() for an array of normalized values, as uint64."""
+    blake2b = hashlib.blake2b
+    digests = b"".join(blake2b(value.encode("utf-8"), digest_size=8).digest() for value in normalized)
+    return np.frombuffer(digests, dtype="<u8").astype(np.uint64, copy=False)
+
+
+def optimal_parameters(num_items, false_positive_rate):
+    """
+    Size a Bloom filter.
+
+    Args:
+        num_items (int): Expected number of distinct items
+        false_positive_rate (float): Target false-positive probability
+
+    Returns:
+        tuple: (num_bits rounded up to a whole byte, num_hashes)
+    """
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("false_positive_rate must be between 0 and 1")
+
+    num_items = max(1, num_items)
+    num_bits = math.ceil(-num_items * math.log(false_positive_rate) / (math.log(2) ** 2))
+    num_bits = max(64, (num_bits + 7) // 8 * 8)
+    num_hashes = max(1, round(num_bits / num_items * math.log(2)))
+    return num_bits, num_hashes
+
+
+def _bit_positions(hashes, num_bits, num_hashes):
+    """
+    Kirsch-Mitzenmacher double hashing: position_i = h1 + i * h2 (mod m).
+
+    Args:
+        hashes (np.ndarray): uint64 hashes, shape (n,)
+
+    Returns:
+        np.ndarray: uint64 bit positions, shape (n, num_hashes)
+    """
+    h1 = hashes & np.uint64(0xFFFFFFFF)
+    h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+    steps = np.arange(num_hashes, dtype=np.uint64)
+    return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(num_bits)
+
+
+# ============================================================================
+# EXACT CONFIRMATION - binary search over a sorted, memory-mapped file
+# ============================================================================
+
+class SortedLineFile:
+    """
+    Exact membership over a sorted newline-separated file, without loading it.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): File with one sorted value per line
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __contains__(self, value):
+        key = value.encode("utf-8") if isinstance(value, str) else value
+        data = self._map
+        lo, hi = 0, len(data)
+
+        # Invariant: the line holding key, if any, starts in [lo, hi)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", 0, mid) + 1
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+
+            line = data[start:end]
+            if line == key:
+                return True
+            if line < key:
+                lo = end + 1
+            else:
+                hi = start
+        return False
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+# ============================================================================
+# BUILDING
+# ============================================================================
+
+def _read_registry_chunks(source_path, chunk_size=BUILD_CHUNK_SIZE):
+    """Yield lists of raw lines from a registry text file."""
+    with open(source_path, encoding="utf-8") as f:
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def build_registry_index(source_path, index_path, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+                         write_exact=True):
+    """
+    Build a registry index from a text file of registration numbers.
+
+    Args:
+        source_path (str): One registration number per line
+        index_path (str): Destination for the Bloom filter
+        false_positive_rate (float): Target false-positive probability
+        write_exact (bool): Also write the sorted <index>.exact file
+
+    Returns:
+        dict: Index header (num_bits, num_hashes, num_items, ...)
+    """
+    start_time = time.time()
+
+    # Pass 1: normalize and de-duplicate (the exact file needs them sorted anyway)
+    distinct = set()
+    for chunk in _read_registry_chunks(source_path):
+        distinct.update(value for value in normalize_registration_numbers(chunk) if value)
+    values = np.array(sorted(distinct), dtype=object)
+    del distinct
+
+    num_bits, num_hashes = optimal_parameters(len(values), false_positive_rate)
+    bits = np.zeros(num_bits, dtype=bool)
+
+    # Pass 2: set bits in chunks to bound the (n, k) position matrix
+    for offset in range(0, len(values), BUILD_CHUNK_SIZE):
+        hashes = _hash_values(values[offset:offset + BUILD_CHUNK_SIZE])
+        bits[_bit_positions(hashes, num_bits, num_hashes).ravel()] = True
+
+    header = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "hash_scheme": HASH_SCHEME,
+        "num_bits": num_bits,
+        "num_hashes": num_hashes,
+        "num_items": int(len(values)),
+        "false_positive_rate": false_positive_rate,
+        "source": os.path.basename(source_path),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    # Pad so the bit array starts on an 8-byte boundary
+    header_bytes += b" " * (-(len(INDEX_MAGIC) + 8 + len(header_bytes)) % 8)
+
+    with open(index_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        f.write(np.packbits(bits, bitorder="little").tobytes())
+
+    if write_exact:
+        with open(index_path + EXACT_SUFFIX, "w", encoding="utf-8", newline="\n") as f:
+            for offset in range(0, len(values), BUILD_CHUNK_SIZE):
+                f.write("\n".join(values[offset:offset + BUILD_CHUNK_SIZE]))
+                f.write("\n")
+
+    header["build_seconds"] = round(time.time() - start_time, 3)
+    return header
+
+
+# ============================================================================
+# QUERYING
+# ============================================================================
+
+class RegistryIndex:
+    """
+    Memory-mapped Bloom filter over issued registration numbers.
+
+    Open with RegistryIndex.open(); opening the same file in many processes
+    shares one copy of the filter through the OS page cache.
+    """
+
+    def __init__(self, header, bits, exact=None, path=None, mapping=None):
+        """
+        Args:
+            header (dict): Index header
+            bits (np.ndarray): uint8 bit array (usually backed by a read-only mmap)
+            exact (SortedLineFile): Exact store for confirming positives
+            path (str): Index file path
+            mapping (mmap.mmap): The mmap behind bits, closed by close()
+        """
+        self.header = header
+        self.num_bits = header["num_bits"]
+        self.num_hashes = header["num_hashes"]
+        self.bits = bits
+        self._bit_bytes = memoryview(bits)   # fast scalar indexing for contains()
+        self._mapping = mapping
+        self.exact = exact
+        self.path = path
+
+    @classmethod
+    def open(cls, index_path, exact=True):
+        """
+        Memory-map an index built by build_registry_index().
+
+        Args:
+            index_path (str): Bloom filter file
+            exact (bool): Also open <index>.exact for confirming positives, if present
+
+        Returns:
+            RegistryIndex: Opened index
+        """
+        with open(index_path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"{index_path} is not a registry index")
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+
+        if header.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {header.get('format_version')} in {index_path} "
+                             f"(expected {INDEX_FORMAT_VERSION}); rebuild it with 'registry_index.py build'")
+        if header.get("hash_scheme") != HASH_SCHEME:
+            raise ValueError(f"Unsupported hash scheme '{header.get('hash_scheme')}' in {index_path}; "
+                             f"rebuild it with 'registry_index.py build'")
+
+        offset = len(INDEX_MAGIC) + 8 + header_length
+        with open(index_path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        bits = np.frombuffer(mapping, dtype=np.uint8, count=header["num_bits"] // 8, offset=offset)
+
+        exact_path = index_path + EXACT_SUFFIX
+        exact_store = SortedLineFile(exact_path) if exact and os.path.exists(exact_path) else None
+        return cls(header, bits, exact=exact_store, path=index_path, mapping=mapping)
+
+    def _probe(self, normalized):
+        """Bloom test for normalized values; returns a bool array."""
+        if len(normalized) == 0:
+            return np.zeros(0, dtype=bool)
+
+        positions = _bit_positions(_hash_values(normalized), self.num_bits, self.num_hashes)
+        byte_values = self.bits[positions >> np.uint64(3)]
+        hits = (byte_values >> (positions & np.uint64(7)).astype(np.uint8)) & np.uint8(1)
+        return hits.all(axis=1)
+
+    def might_contain_many(self, values):
+        """
+        Vectorized Bloom test for a whole column.
+
+        Args:
+            values (iterable or pd.Series): Registration numbers
+
+        Returns:
+            np.ndarray: bool per value; False is definitive, True may be a false positive
+        """
+        normalized = normalize_registration_numbers(values)
+        result = self._probe(normalized)
+        result[normalized == ""] = False
+        return result
+
+    def contains_many(self, values, confirm=True):
+        """
+        Vectorized membership test with optional exact confirmation of positives.
+
+        Args:
+            values (iterable or pd.Series): Registration numbers
+            confirm (bool): Confirm Bloom positives against the .exact file
+
+        Returns:
+            np.ndarray: bool per value
+        """
+        normalized = normalize_registration_numbers(values)
+        result = self._probe(normalized)
+        result[normalized == ""] = False
+
+        if confirm and self.exact is not None:
+            for position in np.flatnonzero(result):
+                result[position] = normalized[position] in self.exact
+        return result
+
+    def contains(self, registration_no, confirm=True):
+        """
+        Test a single registration number.
+
+        Args:
+            registration_no (str): Registration number
+            confirm (bool): Confirm a Bloom positive against the .exact file
+
+        Returns:
+            bool: True if the number is (confirmed to be) in the registry
+        """
+        if registration_no is None or registration_no != registration_no:   # None / NaN
+            return False
+        normalized = str(registration_no).strip().upper()
+        if not normalized:
+            return False
+
+        # Scalar version of _probe(): avoids per-call array overhead on the per-record path
+        hashed = _hash_value(normalized)
+        h1 = hashed & 0xFFFFFFFF
+        h2 = (hashed >> 32) | 1
+        for step in range(self.num_hashes):
+            position = (h1 + step * h2) % self.num_bits
+            if not (self._bit_bytes[position >> 3] >> (position & 7)) & 1:
+                return False
+
+        if confirm and self.exact is not None:
+            return normalized in self.exact
+        return True
+
+    def __contains__(self, registration_no):
+        return self.contains(registration_no)
+
+    def __len__(self):
+        return self.header["num_items"]
+
+    def close(self):
+        # The mmap can only be closed once nothing exports its buffer
+        self._bit_bytes.release()
+        self.bits = None
+        if self._mapping is not None:
+            self._mapping.close()
+        if self.exact is not None:
+            self.exact.close()
+
+
+# ============================================================================
+# SELF-CHECK
+# ============================================================================
+
+def _self_check(num_items=20_000, num_probes=200_000, false_positive_rate=0.01, seed=42):
+    """
+    Check the exact store, the Bloom false-positive rate, scalar/vectorized
+    agreement and index version checks.
+    """
+    import random
+    import tempfile
+
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Binary search over the sorted exact file, including its edges
+        lines_path = os.path.join(tmp, "sorted.txt")
+        with open(lines_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write("B100\nB200\nB300\nB400\n")
+        store = SortedLineFile(lines_path)
+        assert "B100" in store and "B400" in store, "First or last line not found"
+        assert "B200" in store and "B300" in store
+        for missing in ("A000", "B150", "B250", "B350", "C000", "", "B1000"):
+            assert missing not in store, missing
+        store.close()
+
+        empty_path = os.path.join(tmp, "empty.txt")
+        open(empty_path, "w").close()
+        store = SortedLineFile(empty_path)
+        assert "B100" not in store and "" not in store, "Empty file reported a member"
+        store.close()
+        print("  ✓ Exact store binary search (first, last, between, empty)")
+
+        # Measured false-positive rate stays near the configured rate
+        members = {f"KA/{rng.randrange(10**9):09d}/2015" for _ in range(num_items)}
+        source_path = os.path.join(tmp, "registry.txt")
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(members) + "\n")
+        index_path = os.path.join(tmp, "registry.idx")
+        build_registry_index(source_path, index_path, false_positive_rate)
+        index = RegistryIndex.open(index_path)
+
+        assert index.might_contain_many(sorted(members)).all(), "Bloom filter lost a member"
+        outsiders = [f"MH/{number:09d}/2015" for number in range(num_probes)]
+        measured = index.might_contain_many(outsiders).mean()
+        assert false_positive_rate / 2 <= measured <= false_positive_rate * 1.5, measured
+        print(f"  ✓ False-positive rate {measured:.4%} at configured {false_positive_rate:.2%}")
+
+        # Scalar and vectorized lookups agree, with and without confirmation
+        sample = rng.sample(sorted(members), 500) + outsiders[:5000]
+        sample += ["", "   ", None, float("nan"), f"  {sample[0].lower()} "]
+        for confirm in (True, False):
+            scalar = np.array([index.contains(value, confirm=confirm) for value in sample])
+            assert (scalar == index.contains_many(sample, confirm=confirm)).all(), confirm
+        assert not index.contains_many(outsiders[:5000]).any(), "Confirmed a non-member"
+        print("  ✓ contains() and contains_many() agree")
+
+        index.close()
+        assert index._mapping.closed, "close() left the filter mapped"
+
+        # Indexes from an older format or hash scheme are rejected
+        with open(index_path, "rb") as f:
+            f.read(len(INDEX_MAGIC))
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+            bits = f.read()
+        for stale in ({"format_version": 1}, {"hash_scheme": "python-hash"}):
+            stale_bytes = json.dumps({**header, **stale}).encode("utf-8")
+            stale_bytes += b" " * (-(len(INDEX_MAGIC) + 8 + len(stale_bytes)) % 8)
+            stale_path = os.path.join(tmp, "stale.idx")
+            with open(stale_path, "wb") as f:
+                f.write(INDEX_MAGIC + len(stale_bytes).to_bytes(8, "little") + stale_bytes + bits)
+            try:
+                RegistryIndex.open(stale_path)
+                raise AssertionError(f"Stale index accepted: {stale}")
+            except ValueError:
+                pass
+        print("  ✓ Old format versions and hash schemes are rejected")
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a registration-number registry index")
+    subparsers = parser.add_subparsers(dest="command")
+
+    build_parser = subparsers.add_parser("build", help="Build an index from a text file")
+    build_parser.add_argument("source", help="Text file with one registration number per line")
+    build_parser.add_argument("index", help="Index file to write")
+    build_parser.add_argument("--fpr", type=float, default=DEFAULT_FALSE_POSITIVE_RATE,
+                              help="Target false-positive rate")
+    build_parser.add_argument("--no-exact", action="store_true", help="Skip the sorted .exact file")
+
+    check_parser = subparsers.add_parser("check", help="Look up registration numbers")
+    check_parser.add_argument("index", help="Index file")
+    check_parser.add_argument("numbers", nargs="+", help="Registration numbers to check")
+
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        print("=" * 70)
+        print("REGISTRY INDEX SELF-CHECK")
+        print("=" * 70)
+        _self_check()
+        return
+
+    if args.command == "build":
+        header = build_registry_index(args.source, args.index, args.fpr, write_exact=not args.no_exact)
+        print(json.dumps(header, indent=2))
+        return
+
+    index = RegistryIndex.open(args.index)
+    probable = index.might_contain_many(args.numbers)
+    confirmed = index.contains_many(args.numbers)
+    for number, maybe, found in zip(args.numbers, probable, confirmed):
+        print(f"  {number:20} -> bloom={bool(maybe)} registry={bool(found)}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
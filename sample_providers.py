@@ -0,0 +1,142 @@
+# sample_providers.py
+"""
+MedVerify AI - Synthetic Provider Directory
+Generates realistic provider CSVs of any size for load tests and benchmarks
+"""
+
+import argparse
+import csv
+import random
+
+from lookup_tables import SPECIALTY_LIST, CITY_TYPOS, PINCODE_TO_CITY, REQUIRED_FIELDS
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Real directories repeat cities, specialties, pincodes and clinic addresses
+# heavily while phones and registration numbers are mostly unique; the
+# generator mirrors that shape and injects the error types Agent 1 checks.
+
+FIRST_NAMES = [
+    "Rajesh", "Priya", "Arun", "Sneha", "Vikram", "Anita", "Sanjay", "Pooja", "Amit", "Nisha",
+    "Kavya", "Meera", "Akshay", "Deepak", "Ishita", "Rohit", "Suresh", "Lakshmi", "Arjun", "Divya",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Kumar", "Singh", "Verma", "Desai", "Reddy", "Gupta", "Joshi", "Nair",
+    "Iyer", "Menon", "Rao", "Das", "Bose", "Mehta", "Shah", "Pillai", "Chopra", "Kapoor",
+]
+STREETS = [
+    "MG Road", "Marine Drive", "Connaught Place", "Camp Road", "Somajiguda", "Indiranagar",
+    "Whitefield", "Park Circus", "SG Highway", "Teynampet", "Brigade Road", "Fort",
+    "Koregaon Park", "Jubilee Hills", "Bandra", "Kalyani Nagar", "Salt Lake", "Anna Nagar",
+]
+CLINICS_PER_CITY = 250
+
+# Probability of each injected error, per record
+ERROR_RATES = {
+    "phone": 0.03,
+    "pincode": 0.01,
+    "specialty": 0.01,
+    "registration_no": 0.02,
+    "missing_field": 0.01,
+    "city_typo": 0.02,
+}
+INVALID_SPECIALTIES = ["InvalidSpec", "General Medicine Specialist", "Cosmetology", "Unknown"]
+INVALID_REGISTRATIONS = ["INVALID_REG", "BADREGNO", "MCI1001", "123456789"]
+INVALID_PHONES = ["98765", "98765432109", "12345", "abcdefghij"]
+INVALID_PINCODES = ["56001", "060001", "5600001", "abcdef"]
+
+
+def _city_pincodes():
+    """Group the known pincodes by city."""
+    by_city = {}
+    for pincode, city in PINCODE_TO_CITY.items():
+        by_city.setdefault(city, []).append(pincode)
+    return by_city
+
+
+def generate_providers(count, seed=42):
+    """
+    Generate synthetic provider records.
+
+    Args:
+        count (int): Number of records
+        seed (int): Random seed (same seed -> same directory)
+
+    Yields:
+        dict: Provider record with every REQUIRED_FIELDS column
+    """
+    rng = random.Random(seed)
+    pincodes_by_city = _city_pincodes()
+    cities = sorted(pincodes_by_city)
+    typos_by_city = {}
+    for typo, city in CITY_TYPOS.items():
+        if typo != city:
+            typos_by_city.setdefault(city, []).append(typo)
+
+    # A fixed pool of clinics per city, so addresses repeat like real data
+    clinics = {
+        city: [
+            (f"{rng.randint(1, 999)} {rng.choice(STREETS)} {city}", rng.choice(pincodes_by_city[city]))
+            for _ in range(CLINICS_PER_CITY)
+        ]
+        for city in cities
+    }
+    # A few specialties dominate real directories
+    specialty_weights = [1.0 / (rank + 1) for rank in range(len(SPECIALTY_LIST))]
+
+    for provider_id in range(1, count + 1):
+        city = rng.choice(cities)
+        clinic_address, pincode = rng.choice(clinics[city])
+        record = {
+            "id": provider_id,
+            "name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone": f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}",
+            "city": city,
+            "specialty": rng.choices(SPECIALTY_LIST, weights=specialty_weights)[0],
+            "registration_no": f"MCI{10000000 + provider_id}",
+            "years_practice": rng.randint(1, 40),
+            "clinic_address": clinic_address,
+            "pincode": pincode,
+        }
+
+        if rng.random() < ERROR_RATES["phone"]:
+            record["phone"] = rng.choice(INVALID_PHONES)
+        if rng.random() < ERROR_RATES["pincode"]:
+            record["pincode"] = rng.choice(INVALID_PINCODES)
+        if rng.random() < ERROR_RATES["specialty"]:
+            record["specialty"] = rng.choice(INVALID_SPECIALTIES)
+        if rng.random() < ERROR_RATES["registration_no"]:
+            record["registration_no"] = rng.choice(INVALID_REGISTRATIONS)
+        if rng.random() < ERROR_RATES["city_typo"] and typos_by_city.get(city):
+            record["city"] = rng.choice(typos_by_city[city])
+        if rng.random() < ERROR_RATES["missing_field"]:
+            record[rng.choice(REQUIRED_FIELDS[1:])] = ""
+
+        yield record
+
+
+def write_providers_csv(path, count, seed=42):
+    """
+    Write a synthetic provider directory as CSV.
+
+    Args:
+        path (str): Destination file
+        count (int): Number of records
+        seed (int): Random seed
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REQUIRED_FIELDS)
+        writer.writeheader()
+        writer.writerows(generate_providers(count, seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic provider directory")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    write_providers_csv(args.path, args.rows, args.seed)
+    print(f"Wrote {args.rows} providers to {args.path}")
@@ -0,0 +1,373 @@
+# validation_service.py
+"""
+MedVerify AI - Validation Service
+Streaming file runs and a small JSON-over-HTTP service around Agent 1
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from agents import agent_1_validation, use_registry_index
+from aggregation import ValidationAggregator
+from lookup_tables import current_snapshot, reload_lookup_tables, start_lookup_reloader
+from profiling import RequestProfiler, add_profile_arguments, print_report, profile_run
+from provider_record import ProviderRecord
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_REQUEST_BYTES = 10 * 1024 * 1024    # reject request bodies above 10 MB
+REQUEST_TIMEOUT = 30.0                  # seconds a connection may stall mid-request
+DEFAULT_PROFILE_RATE = 0.01             # fraction of requests profiled by serve --profile
+
+
+# ============================================================================
+# STREAMING FILE RUN
+# ============================================================================
+
+def validate_csv_stream(input_file, output_file=None, aggregator=None):
+    """
+    Validate a provider CSV row by row without holding results in memory.
+
+    Rows are read with csv.reader into ProviderRecord objects, validated by
+    Agent 1, optionally written out as JSON lines and folded into an
+    aggregator.
+
+    Args:
+        input_file: Open text file with a header row
+        output_file: Open text file for per-record JSON lines (optional)
+        aggregator (ValidationAggregator): Aggregator to update (new one if None)
+
+    Returns:
+        ValidationAggregator: The updated aggregator
+    """
+    aggregator = aggregator or ValidationAggregator()
+
+    for record in ProviderRecord.from_csv_rows(csv.reader(input_file)):
+        start_time = time.perf_counter()
+        result = agent_1_validation(record)
+        aggregator.update(record, result, time.perf_counter() - start_time)
+        if output_file is not None:
+            output_file.write(json.dumps({"id": record.id, **result}) + "\n")
+
+    return aggregator
+
+
+# ============================================================================
+# HTTP SERVICE
+# ============================================================================
+# POST /validate  body: one record object or a list of them
+#                 reply: {"results": [{"id": ..., "confidence_agent1": ..., ...}]}
+# GET  /health    reply: {"status": "ok", "lookup_tables_version": ...}
+# GET  /metrics   reply: metrics.get_metrics()
+# GET  /profile            reply: profile summary (serve --profile only)
+# GET  /profile/collapsed  reply: collapsed stacks as text/plain (serve --profile only)
+
+def validate_payload(payload):
+    """
+    Validate the records in a /validate request body.
+
+    Args:
+        payload (dict or list): One record or a list of records
+
+    Returns:
+        list: One result dict per record, each including the record 'id'
+
+    Raises:
+        ValueError: If the payload is not a record or list of records
+    """
+    records = payload if isinstance(payload, list) else [payload]
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("Expected a JSON object or a list of JSON objects")
+
+    results = []
+    for record in records:
+        provider = ProviderRecord.from_dict(record)
+        results.append({"id": provider.id, **agent_1_validation(provider)})
+    return results
+
+
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler for the validation service.
+    """
+
+    server_version = "MedVerifyValidation/1.0"
+    timeout = REQUEST_TIMEOUT   # socket timeout, so a short body cannot pin a thread in rfile.read
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, body):
+        self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        profiler = getattr(self.server, "profiler", None)
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "lookup_tables_version": current_snapshot().version})
+        elif self.path == "/metrics":
+            self._send_json(200, metrics.get_metrics())
+        elif self.path == "/profile" and profiler is not None:
+            self._send_json(200, profiler.summary())
+        elif self.path == "/profile/collapsed" and profiler is not None:
+            self._send(200, profiler.collapsed_stacks().encode("utf-8"), "text/plain; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/validate":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        start_time = time.perf_counter()
+        metrics.increment("service.requests")
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            metrics.increment("service.rejected")
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            metrics.increment("service.rejected")
+            self._send_json(413, {"error": "Request body too large"})
+            return
+
+        try:
+            body = self.rfile.read(length)
+        except TimeoutError:
+            body = None
+        if body is None or len(body) < length:
+            metrics.increment("service.rejected")
+            self.close_connection = True
+            self._send_json(408, {"error": "Request body shorter than Content-Length"})
+            return
+
+        profiler = getattr(self.server, "profiler", None)
+        with profiler.maybe_profile() if profiler is not None else nullcontext():
+            try:
+                results = validate_payload(json.loads(body or b"null"))
+            except ValueError as e:   # includes json.JSONDecodeError
+                metrics.increment("service.rejected")
+                self._send_json(400, {"error": str(e)})
+                return
+            except RecursionError:
+                metrics.increment("service.rejected")
+                self._send_json(400, {"error": "Request body is nested too deeply"})
+                return
+            except Exception as e:
+                metrics.increment("service.errors")
+                self.log_error("Validation failed: %r", e)
+                self._send_json(500, {"error": "Internal error while validating"})
+                return
+
+            metrics.increment("service.records", len(results))
+            self._send_json(200, {"results": results})
+        metrics.observe("service.request_seconds", time.perf_counter() - start_time)
+
+    def log_request(self, code="-", size="-"):
+        pass  # Request volume is tracked in metrics instead of stderr; errors still go there
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, profiler=None):
+    """
+    Create (but do not start) the validation HTTP server.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on (0 picks a free port)
+        profiler (RequestProfiler): Profile a fraction of /validate requests (optional)
+
+    Returns:
+        ThreadingHTTPServer: Server; call serve_forever() to run it
+    """
+    server = ThreadingHTTPServer((host, port), ValidationRequestHandler)
+    server.profiler = profiler
+    return server
+
+
+# ============================================================================
+# SELF-CHECK
+# ============================================================================
+
+def _self_check():
+    """
+    Exercise the HTTP endpoints and the streaming run end to end.
+    """
+    import contextlib
+    import http.client
+    import io
+    import socket
+    import threading
+
+    record = {
+        "id": "1", "name": "Dr. Rajesh Sharma", "phone": "9876543210", "city": "Bangalore",
+        "specialty": "Cardiology", "registration_no": "MCI10012345", "years_practice": "8",
+        "clinic_address": "123 MG Road Bangalore", "pincode": "560001",
+    }
+
+    server = create_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    try:
+        status, data = request("POST", "/validate", json.dumps([record, {**record, "phone": "123"}]))
+        assert status == 200, status
+        assert [r["confidence_agent1"] for r in json.loads(data)["results"]] == [100, 80]
+        status, data = request("POST", "/validate", json.dumps(record))
+        assert status == 200 and json.loads(data)["results"][0]["id"] == "1"
+        print("  ✓ POST /validate")
+
+        assert request("POST", "/validate", b"{not json")[0] == 400
+        assert request("POST", "/validate", json.dumps([1, 2]))[0] == 400
+        assert request("POST", "/validate", b"", {"Content-Length": "abc"})[0] == 400
+        assert request("POST", "/validate", b"", {"Content-Length": "-1"})[0] == 400
+        assert request("POST", "/validate", b"{}", {"Content-Length": str(MAX_REQUEST_BYTES + 1)})[0] == 413
+        assert request("POST", "/validate", b"[" * 100_000)[0] == 400
+        print("  ✓ Bad bodies and Content-Length rejected (400/413)")
+
+        # A body shorter than its Content-Length times out instead of holding the thread
+        timeout, ValidationRequestHandler.timeout = ValidationRequestHandler.timeout, 0.5
+        try:
+            with socket.create_connection(("127.0.0.1", server.server_address[1]), timeout=5) as sock:
+                sock.sendall(b"POST /validate HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n{}")
+                assert sock.recv(1024).startswith(b"HTTP/1.0 408"), "Short body was not timed out"
+        finally:
+            ValidationRequestHandler.timeout = timeout
+        print("  ✓ Stalled request body times out (408)")
+
+        # Unexpected validation errors answer 500 instead of dropping the connection
+        def broken(record):
+            raise RuntimeError("validator bug")
+
+        validator, globals()["agent_1_validation"] = agent_1_validation, broken
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                assert request("POST", "/validate", json.dumps(record))[0] == 500
+        finally:
+            globals()["agent_1_validation"] = validator
+        assert request("POST", "/validate", json.dumps(record))[0] == 200
+        print("  ✓ Validator errors answered with 500")
+
+        assert request("GET", "/health")[0] == 200
+        assert request("GET", "/metrics")[0] == 200
+        assert request("GET", "/profile")[0] == 404          # only with --profile
+        assert request("GET", "/missing")[0] == 404
+        assert request("POST", "/missing", b"{}")[0] == 404
+        print("  ✓ GET /health, /metrics and 404s")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    rows = [",".join(record), ",".join(record.values()), ",".join({**record, "pincode": "0"}.values())]
+    output = io.StringIO()
+    aggregator = validate_csv_stream(io.StringIO("\n".join(rows) + "\n"), output)
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert aggregator.records == 2 and [line["confidence_agent1"] for line in lines] == [100, 80]
+    print("  ✓ Streaming CSV run")
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MedVerify AI validation service")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Validate a provider CSV in one streaming pass")
+    run_parser.add_argument("path", help="Provider CSV file ('-' for stdin)")
+    run_parser.add_argument("--output", default=None, help="Write per-record results as JSON lines")
+    run_parser.add_argument("--report-json", default=None, help="Write the JSON summary report here")
+    run_parser.add_argument("--report-csv", default=None, help="Write the CSV summary report here")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve POST /validate over HTTP")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--profile-rate", type=float, default=DEFAULT_PROFILE_RATE,
+                              help="Fraction of requests to profile with --profile (default 0.01)")
+
+    subparsers.add_parser("check", help="Run the service self-check")
+
+    for mode_parser in (run_parser, serve_parser):
+        mode_parser.add_argument("--lookup-tables", default=None,
+                                 help="JSON lookup data file (hot-reloaded while serving)")
+        mode_parser.add_argument("--registry-index", default=None,
+                                 help="Registry index to check registration numbers against")
+        add_profile_arguments(mode_parser)
+
+    args = parser.parse_args(argv)
+
+    if args.mode == "check":
+        _self_check()
+        return
+
+    if args.registry_index:
+        from registry_index import RegistryIndex
+        use_registry_index(RegistryIndex.open(args.registry_index))
+
+    if args.mode == "serve":
+        if args.lookup_tables:
+            start_lookup_reloader(args.lookup_tables)
+        profiler = RequestProfiler(args.profile_rate, interval=args.profile_interval) if args.profile else None
+        server = create_server(args.host, args.port, profiler)
+        print(f"Validation service listening on http://{args.host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if profiler is not None:
+                profiler.stop()
+                print_report(profiler, args.profile_output)
+        return
+
+    if args.lookup_tables:
+        reload_lookup_tables(args.lookup_tables)
+
+    with profile_run(args):
+        output_file = open(args.output, "w", encoding="utf-8") if args.output else None
+        input_file = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+        try:
+            aggregator = validate_csv_stream(input_file, output_file)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            if output_file is not None:
+                output_file.close()
+
+        if args.report_json:
+            aggregator.write_json_report(args.report_json)
+        if args.report_csv:
+            aggregator.write_csv_report(args.report_csv)
+
+    if not (args.report_json or args.report_csv):
+        print(json.dumps(aggregator.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()